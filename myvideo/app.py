@@ -1,16 +1,35 @@
 import os
 import uuid
 import subprocess
-from flask import Flask, request, render_template, send_from_directory, jsonify
+from flask import Flask, Response, request, render_template, send_from_directory, jsonify
 import whisper
-from deep_translator import GoogleTranslator
-from gtts import gTTS
 import pysrt
 import math
+import mimetypes
 import ffmpeg
 import yt_dlp
 import json
 import re
+import shutil
+import tempfile
+import threading
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from jobs import JobQueue, QueueFullError
+from checkpoints import load_manifest, sweep_checkpoints
+from batches import BATCH_CONCURRENCY, Batch, BatchError, BatchManager
+from stages import StageGraph
+from cache import DownloadCache, TranscriptionCache
+from model_registry import ModelRegistry
+from parallel_transcribe import (PARALLEL_TRANSCRIBE_WORKERS, should_parallelize, should_stream_windows,
+                                 transcribe_parallel, transcribe_windows)
+from tts import synthesize_timed_speech, synthesize_to_file, tts_cache
+from storage import StorageManager, artifact_size
+from translation import translate_segments, translate_transcript, translation_memory
+from uploads import UploadError, UploadManager
+from hls import package_hls
+from metrics import count, metrics, timed_stage
+from backends import get_speech_engine, get_translator
 
 app = Flask(__name__)
 UPLOAD_FOLDER = 'uploads'
@@ -18,12 +37,65 @@ OUTPUT_FOLDER = 'static'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-# Choose small model for demo speed: "tiny", "base", "small", "medium", "large"
-WHISPER_MODEL = "tiny"
+# /static/ is served by send_file, which answers Range requests with 206 and
+# hands the file to the server's wsgi.file_wrapper (sendfile under gunicorn).
+# Behind Apache/lighttpd, USE_X_SENDFILE=1 lets the front end send it instead.
+app.config['USE_X_SENDFILE'] = os.getenv("USE_X_SENDFILE", "0") == "1"
+# Output names are unique per job, so clients and proxies may cache them
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.getenv("STATIC_MAX_AGE", "86400"))
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+mimetypes.add_type('text/vtt', '.vtt')
 
-print("Loading Whisper model:", WHISPER_MODEL)
-model = whisper.load_model(WHISPER_MODEL)
-# GoogleTranslator will be initialized per request
+# Default model when a job doesn't ask for one: "tiny", "base", "small", "medium", "large"
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "tiny")
+# Decode audio once through an ffmpeg pipe straight into whisper instead of
+# writing a temporary WAV into uploads/ and decoding it a second time
+AUDIO_PIPE_MODE = os.getenv("AUDIO_PIPE_MODE", "1") == "1"
+# Dub each translated segment in its own time window instead of one long clip
+TIMED_TTS = os.getenv("TIMED_TTS", "1") == "1"
+# Fetch the audio-only stream first and transcribe it while the video downloads
+PIPELINED_DOWNLOAD = os.getenv("PIPELINED_DOWNLOAD", "1") == "1"
+# Detect the spoken language from the first 30 s (Whisper's window) and pin it for
+# the full transcription; below the minimum probability Whisper detects as before
+LANGUAGE_DETECT = os.getenv("LANGUAGE_DETECT", "1") == "1"
+LANGUAGE_DETECT_MIN_PROBABILITY = float(os.getenv("LANGUAGE_DETECT_MIN_PROBABILITY", "0.5"))
+# Seconds between keep-alive comments on an idle job event stream
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Translator and TTS backends come from TRANSLATOR_BACKEND / TTS_BACKEND;
+# resolve them now so a typo fails at startup rather than inside a job
+get_translator()
+get_speech_engine()
+
+# Whisper models are loaded on first use and evicted LRU under a memory budget
+model_registry = ModelRegistry()
+# Whisper results are cached by audio content + model, so re-runs skip transcription
+transcription_cache = TranscriptionCache()
+# YouTube downloads are kept by video ID under a disk quota
+download_cache = DownloadCache()
+# video ID -> [lock, number of threads using it]; dropped when the last one is done
+_download_locks = {}
+_download_locks_guard = threading.Lock()
+# Full-video downloads that run behind transcription in pipelined mode
+_video_downloads = ThreadPoolExecutor(max_workers=4, thread_name_prefix="video-download")
+# Early translations of streamed segments, kept off Whisper's thread
+_stream_translations = ThreadPoolExecutor(max_workers=4, thread_name_prefix="stream-translate")
+
+# Video pipelines run on a bounded worker pool; routes return a job ID
+job_queue = JobQueue()
+
+# Everything written to uploads/ and static/ is tracked for TTL/quota cleanup.
+# The same sweeper expires job checkpoints; failed jobs stay retryable until then
+storage = StorageManager()
+storage.reindex()
+storage.start_sweeper(extra_sweeps=[sweep_checkpoints])
+
+# Resumable chunked uploads for /process, deduplicated by content hash
+upload_manager = UploadManager(UPLOAD_FOLDER)
+
+# Playlists and URL lists fed to the job queue a few videos at a time
+batch_manager = BatchManager(job_queue, OUTPUT_FOLDER, storage)
 
 # Educational content localization data
 REGIONAL_DATA = {
@@ -71,38 +143,120 @@ REGIONAL_DATA = {
     }
 }
 
-# Utility: download YouTube video
-def download_youtube_video(url, output_dir):
+# Utility: fetch YouTube metadata once (no download)
+def extract_youtube_info(url):
+    with yt_dlp.YoutubeDL({'noplaylist': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    video_title = info.get('title', 'video')
+    # Clean title for display and file names
+    safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    return info, safe_title
+
+# Utility: download a YouTube video from extracted info, reusing an earlier
+# download of the same video ID
+def fetch_youtube_video(info, safe_title, count_lookup=True):
     """
-    Download a YouTube video and return the path to the downloaded file.
+    Return the path of the full video, downloading it only on a cache miss.
+
+    New downloads land in a private temp folder and are moved into the
+    download cache atomically. count_lookup=False when the caller already
+    looked the video up in the cache (and counted that as a miss).
     """
+    video_id = info['id']
+    with _download_locks_guard:
+        entry = _download_locks.setdefault(video_id, [threading.Lock(), 0])
+        if not entry[1]:
+            # Nothing evicts this video while anyone holds or waits for its lock
+            download_cache.pin(video_id)
+        entry[1] += 1
+    try:
+        # One download per video ID; concurrent requests wait and then hit the cache
+        with entry[0]:
+            return _fetch_youtube_video_locked(info, safe_title, count_lookup)
+    finally:
+        with _download_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _download_locks[video_id]
+                download_cache.unpin(video_id)
+
+def _fetch_youtube_video_locked(info, safe_title, count_lookup):
+    # fetch_youtube_video() with the video's download lock held
+    video_id = info['id']
+    cached = download_cache.get(video_id, count=count_lookup)
+    if cached:
+        print(f"Download cache hit for {video_id}, skipping download")
+        return cached[0]
+
+    tmp_dir = tempfile.mkdtemp(prefix='.download-', dir=download_cache.folder)
+    try:
+        ydl_opts = {
+            'format': 'best[ext=mp4]/best',  # prefer mp4 format
+            'outtmpl': os.path.join(tmp_dir, '%(id)s.%(ext)s'),
+            'noplaylist': True,
+        }
+        # Reuse the extracted info so the page isn't fetched a second time
+        with timed_stage('download_video'), yt_dlp.YoutubeDL(ydl_opts) as ydl_download:
+            ydl_download.process_ie_result(dict(info), download=True)
+
+        downloaded_files = [f for f in os.listdir(tmp_dir)
+                            if f.startswith(video_id) and not f.endswith('.part')]
+        if not downloaded_files:
+            raise Exception("Failed to find downloaded video file")
+        count('bytes_written', os.path.getsize(os.path.join(tmp_dir, downloaded_files[0])), stage='download_video')
+        return download_cache.put(video_id, os.path.join(tmp_dir, downloaded_files[0]), {
+            'title': info.get('title', 'video'),
+            'safe_title': safe_title,
+            'webpage_url': info.get('webpage_url'),
+        })
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Utility: download only the audio stream of a YouTube video into dest_dir
+def fetch_youtube_audio(info, dest_dir):
     ydl_opts = {
-        'format': 'best[ext=mp4]/best',  # prefer mp4 format
-        'outtmpl': os.path.join(output_dir, '%(title)s.%(ext)s'),
+        'format': 'bestaudio[ext=m4a]/bestaudio',
+        'outtmpl': os.path.join(dest_dir, '%(id)s.audio.%(ext)s'),
         'noplaylist': True,
     }
-    
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        # Get video info first
-        info = ydl.extract_info(url, download=False)
-        video_title = info.get('title', 'video')
-        
-        # Clean filename for safety
-        safe_title = "".join(c for c in video_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        
-        # Update output template with safe filename
-        ydl_opts['outtmpl'] = os.path.join(output_dir, f'{safe_title}.%(ext)s')
-        
-        # Download the video
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl_download:
-            ydl_download.download([url])
-            
-        # Find the downloaded file
-        downloaded_files = [f for f in os.listdir(output_dir) if f.startswith(safe_title)]
-        if downloaded_files:
-            return os.path.join(output_dir, downloaded_files[0]), safe_title
-        else:
-            raise Exception("Failed to find downloaded video file")
+        ydl.process_ie_result(dict(info), download=True)
+    for f in os.listdir(dest_dir):
+        if f.startswith(f"{info['id']}.audio.") and not f.endswith('.part'):
+            return os.path.join(dest_dir, f)
+    raise Exception("Failed to find downloaded audio file")
+
+# Utility: download YouTube video
+def download_youtube_video(url):
+    """
+    Download a YouTube video and return (path, safe_title).
+    """
+    info, safe_title = extract_youtube_info(url)
+    return fetch_youtube_video(info, safe_title), safe_title
+
+# Utility: start a YouTube download so transcription can begin as early as possible.
+# Returns (audio_source, video_future, safe_title, video_id): in pipelined mode the
+# small audio-only stream is fetched first while the full video keeps downloading
+# in the background; video_future resolves to the video path for the final mux.
+# The audio source differs between the two modes, so transcripts are cached by
+# video_id rather than by the decoded audio.
+def start_youtube_download(url, work_dir):
+    info, safe_title = extract_youtube_info(url)
+    cached = download_cache.get(info['id'])
+    if cached or not PIPELINED_DOWNLOAD:
+        video_path = cached[0] if cached else fetch_youtube_video(info, safe_title, count_lookup=False)
+        video_future = Future()
+        video_future.set_result(video_path)
+        return video_path, video_future, safe_title, info['id']
+
+    video_future = _video_downloads.submit(fetch_youtube_video, info, safe_title, count_lookup=False)
+    try:
+        audio_path = fetch_youtube_audio(info, work_dir)
+    except Exception as e:
+        # No separate audio stream: fall back to the full video
+        print("Audio-only download failed, waiting for the video:", e)
+        audio_path = video_future.result()
+    return audio_path, video_future, safe_title, info['id']
 
 # Utility: extract audio to wav using ffmpeg
 def extract_audio(input_path, output_audio_path):
@@ -114,16 +268,144 @@ def extract_audio(input_path, output_audio_path):
     ]
     subprocess.run(command, check=True)
 
-# Utility: replace audio track in video with new audio
-def replace_audio(original_video, new_audio, output_video):
-    # ffmpeg -y -i original_video -i new_audio -c:v copy -map 0:v:0 -map 1:a:0 -shortest output_video
-    command = [
-        'ffmpeg', '-y', '-i', original_video, '-i', new_audio,
-        '-c:v', 'copy', '-map', '0:v:0', '-map', '1:a:0', '-shortest',
-        output_video
+# Utility: decode audio to a mono 16 kHz float32 array through an ffmpeg pipe,
+# optionally only the first max_seconds
+def load_audio_pipe(input_path, max_seconds=None):
+    # ffmpeg -i input.mp4 -vn -f s16le -acodec pcm_s16le -ar 16000 -ac 1 -
+    command = ['ffmpeg', '-nostdin', '-i', input_path]
+    if max_seconds:
+        command += ['-t', str(max_seconds)]
+    command += [
+        '-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', '16000', '-ac', '1',
+        '-'
     ]
+    out = subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+# Utility: get audio ready for whisper, either as an array or as a WAV on disk
+def prepare_audio(input_path, audio_wav):
+    if AUDIO_PIPE_MODE:
+        return load_audio_pipe(input_path)
+    extract_audio(input_path, audio_wav)
+    return audio_wav
+
+# Utility: detect the spoken language from the first 30 s of audio (WAV path or
+# float32 array); returns (language, probability)
+def detect_language(audio, whisper_model=WHISPER_MODEL):
+    window_seconds = whisper.audio.CHUNK_LENGTH
+    if isinstance(audio, str):
+        audio = load_audio_pipe(audio, max_seconds=window_seconds)
+    clip = whisper.pad_or_trim(np.asarray(audio[:window_seconds * whisper.audio.SAMPLE_RATE], dtype=np.float32))
+    with model_registry.use(whisper_model) as model:
+        mel = whisper.log_mel_spectrogram(clip, model.dims.n_mels).to(model.device)
+        _, probs = model.detect_language(mel)
+    language = max(probs, key=probs.get)
+    return language, float(probs[language])
+
+# Utility: transcribe 16 kHz audio (WAV path or float32 array) with whisper,
+# reusing cached results. on_segments(segments, final, language) gets segments as chunks
+# finish in parallel mode, or window by window (STREAM_WINDOW_SECONDS) for shorter audio;
+# without on_segments whisper runs in one pass and hands them over at the end.
+# Language detection and Whisper are timed as separate stages, on job when given.
+def transcribe_audio(audio, whisper_model=WHISPER_MODEL, on_segments=None, job=None):
+    cache_key = TranscriptionCache.key_for(audio, whisper_model)
+    cached = transcription_cache.get(cache_key)
+    if cached is not None:
+        print("Transcription cache hit, skipping Whisper")
+        return cached
+    if isinstance(audio, str) and (PARALLEL_TRANSCRIBE_WORKERS > 1 or on_segments):
+        # whisper would decode the file itself anyway; do it here to measure length
+        audio = whisper.load_audio(audio)
+    language = None  # let model detect language
+    if LANGUAGE_DETECT:
+        with timed_stage('detect_language', job):
+            detected, probability = detect_language(audio, whisper_model)
+        print(f"Detected language: {detected} (p={probability:.2f})")
+        if probability >= LANGUAGE_DETECT_MIN_PROBABILITY:
+            language = detected
+    with timed_stage('transcribe', job):
+        if not isinstance(audio, str) and should_parallelize(audio):
+            result = transcribe_parallel(audio, whisper_model, on_segments, language)
+        elif on_segments and should_stream_windows(audio):
+            print(f"Transcribing audio with Whisper ({whisper_model}) window by window...")
+            with model_registry.use(whisper_model) as model:
+                result = transcribe_windows(audio, model, on_segments, language)
+        else:
+            print(f"Transcribing audio with Whisper ({whisper_model})...")
+            with model_registry.use(whisper_model) as model:
+                result = model.transcribe(audio, language=language)
+    return transcription_cache.put(cache_key, result)
+
+# Utility: whether a transcript in source_lang already is in target_lang
+# (Whisper gives bare codes like "zh"; targets may carry a region, e.g. "zh-CN")
+def same_language(source_lang, target_lang):
+    if not source_lang or not target_lang:
+        return False
+    return source_lang.split('-')[0].lower() == target_lang.split('-')[0].lower()
+
+# Utility: media duration in seconds (None if ffprobe can't tell)
+def probe_duration(path):
+    try:
+        return float(ffmpeg.probe(path)['format']['duration'])
+    except (ffmpeg.Error, KeyError, ValueError):
+        return None
+
+# Utility: length of prepared audio (float32 16 kHz array or file) in seconds
+def audio_duration(audio):
+    if isinstance(audio, str):
+        return probe_duration(audio)
+    return len(audio) / 16000.0
+
+# Utility: synthesize the dubbed narration, timed to the segments when possible
+def synthesize_speech(translated_full, translated_segments, target_lang, tts_audio_path, total_duration=None):
+    if TIMED_TTS and any(s['text'] for s in translated_segments):
+        print(f"Synthesizing timed speech per segment ({get_speech_engine().name})...")
+        synthesize_timed_speech(translated_segments, target_lang, tts_audio_path,
+                                total_duration=total_duration)
+    else:
+        print(f"Synthesizing speech ({get_speech_engine().name})...")
+        synthesize_to_file(translated_full, target_lang, tts_audio_path)
+
+# Utility: replace audio track in video with new audio, in a single ffmpeg run.
+# soft_subs embeds srt_path as a mov_text track (no re-encode); burned_video
+# adds a second output with the subtitles burned in, encoded from the same decode.
+def replace_audio(original_video, new_audio, output_video, srt_path=None,
+                  soft_subs=False, burned_video=None, subtitle_lang=None):
+    # ffmpeg -y -i original_video -i new_audio -c:v copy -map 0:v:0 -map 1:a:0 -shortest output_video
+    # With new_audio=None the original soundtrack is copied through untouched
+    command = ['ffmpeg', '-y', '-i', original_video]
+    if new_audio:
+        command += ['-i', new_audio]
+    audio_map = '1:a:0' if new_audio else '0:a:0?'
+    embed_subs = soft_subs and srt_path
+    if embed_subs:
+        command += ['-i', srt_path]
+    if burned_video:
+        # ffmpeg subtitles filter expects path without spaces or we can escape. Use absolute path.
+        command += ['-filter_complex', f"[0:v:0]subtitles={os.path.abspath(srt_path)}[burned]"]
+
+    command += ['-map', '0:v:0', '-map', audio_map]
+    if embed_subs:
+        command += ['-map', f"{2 if new_audio else 1}:s:0", '-c:s', 'mov_text']
+        if subtitle_lang:
+            command += ['-metadata:s:s:0', f'language={subtitle_lang}']
+    command += ['-c:v', 'copy']
+    if not new_audio:
+        command += ['-c:a', 'copy']
+    command += ['-shortest', output_video]
+
+    if burned_video:
+        command += ['-map', '[burned]', '-map', audio_map, '-shortest', burned_video]
     subprocess.run(command, check=True)
 
+# Utility: package a translated MP4 as an HLS bitrate ladder (with a WebVTT track) in static/
+def package_stream(video_path, srt_path, lang, prefix, job_id=None):
+    hls_dir = os.path.join(OUTPUT_FOLDER, f"{prefix}_hls")
+    shutil.rmtree(hls_dir, ignore_errors=True)
+    package_hls(video_path, hls_dir, srt_path, lang)
+    storage.record(hls_dir, job_id)
+    return f"/static/{prefix}_hls/master.m3u8"
+
 # Utility: generate basic SRT from transcription timestamps
 def segments_to_srt(segments, srt_path):
     subs = pysrt.SubRipFile()
@@ -142,16 +424,6 @@ def segments_to_srt(segments, srt_path):
         subs.append(sub)
     subs.save(srt_path, encoding='utf-8')
 
-# Optional: burn subtitles into video using ffmpeg
-def burn_subtitles(video_in, srt_path, video_out):
-    # ffmpeg -y -i video_in -vf subtitles=sub.srt -c:a copy video_out
-    command = [
-        'ffmpeg', '-y', '-i', video_in,
-        '-vf', f"subtitles={srt_path}",
-        '-c:a', 'copy', video_out
-    ]
-    subprocess.run(command, check=True)
-
 def extract_stem_concepts(transcript):
     """Extract important STEM concepts from transcript"""
     # Simple keyword-based extraction - can be enhanced with NLP
@@ -336,197 +608,581 @@ def localize_educational_content(transcript, region_id, target_lang):
 def index():
     return render_template('index.html')
 
+@app.after_request
+def touch_served_artifact(response):
+    # Served outputs count as recently used for the storage LRU
+    if request.path.startswith('/static/') and response.status_code in (200, 206, 304):
+        # An HLS segment counts as a use of its whole <prefix>_hls package
+        storage.touch(os.path.join(OUTPUT_FOLDER, request.path[len('/static/'):].split('/')[0]))
+    return response
+
+@app.route('/storage_status', methods=['GET'])
+def storage_status():
+    """Per-folder usage, quotas and TTLs from the storage manifest."""
+    return jsonify(storage.status())
+
+def enqueue_job(kind, func, params, job_id=None):
+    """Put a pipeline on the job queue and answer 202 with its status URL."""
+    try:
+        job = job_queue.submit(kind, func, params, job_id)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f"/jobs/{job.id}",
+        'events_url': f"/jobs/{job.id}/events"
+    }), 202
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and sizes of the transcription, translation, TTS and download caches."""
+    return jsonify({
+        'transcription_cache': transcription_cache.stats(),
+        'translation_memory': translation_memory.stats(),
+        'tts_cache': tts_cache.stats(),
+        'download_cache': download_cache.stats(),
+        'whisper_models_loaded_mb': model_registry.loaded(),
+        'backends': {'translator': get_translator().name, 'tts': get_speech_engine().name}
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage durations, input sizes and errors in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a queued pipeline job: stage, progress and, once done, its result."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-Sent Events stream of a job: 'stage' on every stage/progress change,
+    'segments' with Whisper segments as they are decoded, 'translation' with
+    their translations per language, and a final 'done' or 'failed'.
+
+    Past events are replayed first; a reconnecting client resumes after
+    Last-Event-ID (or ?last_event_id=).
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', request.args.get('last_event_id', -1)))
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+
+    def stream(last_id):
+        while True:
+            events = job.events_since(last_id, timeout=SSE_HEARTBEAT_SECONDS)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+                last_id = event['id']
+                if event['event'] in ('done', 'failed'):
+                    return
+
+    return Response(stream(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/retry', methods=['POST'])
+def retry_job(job_id):
+    """
+    Run a failed job again from its checkpoints: stages that finished before
+    (download, transcript, per-language translation, TTS, mux) are skipped.
+    Works after a server restart as long as the job directory is still there;
+    a job the manifest still shows as queued or running was cut off by the
+    restart and counts as failed.
+    """
+    manifest = load_manifest(job_id)
+    if not manifest or manifest.get('kind') not in PIPELINES:
+        return jsonify({'error': 'Job not found'}), 404
+    job = job_queue.get(job_id)
+    status = job.status if job else manifest.get('status', 'failed')
+    if (job and status != 'failed') or status == 'done':
+        return jsonify({'error': f'Job is {status}, only failed jobs can be retried'}), 409
+    return enqueue_job(manifest['kind'], PIPELINES[manifest['kind']], manifest['params'], job_id)
+
+def parse_target_langs(value, default='hi'):
+    """Accept a list or a comma-separated string of language codes."""
+    if not value:
+        return [default]
+    if isinstance(value, str):
+        value = value.split(',')
+    langs = []
+    for lang in value:
+        lang = str(lang).strip()
+        if lang and lang not in langs:
+            langs.append(lang)
+    return langs or [default]
+
+def add_language_stages(graph, job, target_lang, prefix, burn_subs, soft_subs, hls=False):
+    """
+    Add the stages that translate, dub, subtitle and mux one target language.
+
+    When the transcript is already in target_lang, translation and TTS are
+    skipped: the original speech becomes the subtitles and the original
+    soundtrack is kept (passthrough). They hang off the graph's 'transcribe' and 'video' stages: TTS and the SRT
+    both start as soon as the translation is in, and only the mux waits for
+    the video. Every step is checkpointed per language in the job's directory,
+    so a retry redoes only the steps that didn't finish. Returns the name of
+    the stage whose result is this language's response.
+    """
+    job_id = job.id
+    ckpt = job.checkpoint
+    tts_audio_path = os.path.join(OUTPUT_FOLDER, f"{prefix}_tts.mp3")
+    srt_path = os.path.join(OUTPUT_FOLDER, f"{prefix}.srt")
+    output_video_path = os.path.join(OUTPUT_FOLDER, f"{prefix}_translated.mp4")
+    burned_video_path = os.path.join(OUTPUT_FOLDER, f"{prefix}_burned.mp4") if burn_subs else None
+    hls_dir = os.path.join(OUTPUT_FOLDER, f"{prefix}_hls")
+
+    # Translate text: segments are translated in size-limited batches (for
+    # subtitles) and the narration is assembled from them, so each word is
+    # translated once
+    def translate(transcript):
+        if same_language(transcript.get('language'), target_lang):
+            print(f"Source is already in {target_lang}, skipping translation and TTS")
+            segments = [{'start': s['start'], 'end': s['end'], 'text': s['text'].strip()}
+                        for s in transcript.get('segments', [])]
+            return {'full': transcript['text'].strip(), 'segments': segments, 'passthrough': True}
+
+        def compute():
+            full_text, segments = transcript['text'], transcript.get('segments', [])
+            print("Translating text to", target_lang)
+            with timed_stage('translate', job):
+                translated_full, translated_segments = translate_transcript(full_text, segments, target_lang,
+                                                                            transcript.get('language'))
+            count('translated_characters', sum(len(s['text']) for s in segments) or len(full_text), job,
+                  lang=target_lang)
+            return {'full': translated_full, 'segments': translated_segments}
+
+        translated = ckpt.json_stage(f"translate:{target_lang}", compute)
+        job.emit('translation', {'lang': target_lang,
+                                 'segments': segment_events(transcript.get('segments', []), translated['segments'])})
+        return translated
+
+    # Synthesize translated audio (clips come from the TTS cache on a retry)
+    def synthesize(translated, transcript):
+        if translated.get('passthrough'):
+            return
+
+        def compute():
+            with timed_stage('tts', job):
+                synthesize_speech(translated['full'], translated['segments'], target_lang, tts_audio_path,
+                                  transcript.get('duration'))
+            count('synthesized_characters', len(translated['full']), job, lang=target_lang)
+            count('bytes_written', artifact_size(tts_audio_path), job, stage='tts')
+
+        ckpt.file_stage(f"tts:{target_lang}", [tts_audio_path], compute)
+
+    # Create subtitles file in target language
+    def write_srt(translated):
+        segments_to_srt(translated['segments'], srt_path)
+
+    # Replace original audio in video with the TTS audio; burned subtitles
+    # (if requested) come out of the same ffmpeg pass
+    def mux(translated, _tts, _srt, video_path):
+        new_audio = None if translated.get('passthrough') else tts_audio_path
+
+        def compute():
+            with timed_stage('mux', job):
+                replace_audio(video_path, new_audio, output_video_path, srt_path=srt_path,
+                              soft_subs=soft_subs, burned_video=burned_video_path, subtitle_lang=target_lang)
+            count('bytes_written', sum(artifact_size(p) for p in (srt_path, output_video_path, burned_video_path) if p),
+                  job, stage='mux')
+
+        ckpt.file_stage(f"mux:{target_lang}", [srt_path, output_video_path, burned_video_path], compute)
+
+    def package(_mux):
+        def compute():
+            with timed_stage('hls', job):
+                package_stream(output_video_path, srt_path, target_lang, prefix, job_id)
+            count('bytes_written', artifact_size(hls_dir), job, stage='hls')
+
+        ckpt.file_stage(f"hls:{target_lang}", [os.path.join(hls_dir, 'master.m3u8')], compute)
+
+    def respond(translated, *_done):
+        translated_full = translated['full']
+        response = {
+            'translated_text_preview': (translated_full[:1000] + '...') if len(translated_full) > 1000 else translated_full,
+            'video_url': f"/static/{os.path.basename(output_video_path)}",
+            'srt_url': f"/static/{os.path.basename(srt_path)}"
+        }
+        if burned_video_path:
+            response['burned_video_url'] = f"/static/{os.path.basename(burned_video_path)}"
+        for path in (tts_audio_path, srt_path, output_video_path, burned_video_path):
+            storage.record(path, job_id)
+        if hls:
+            response['hls_url'] = f"/static/{prefix}_hls/master.m3u8"
+        if translated.get('passthrough'):
+            response['passthrough'] = True
+        return response
+
+    translated = graph.add(f"translate:{target_lang}", translate, ['transcribe'])
+    tts = graph.add(f"tts:{target_lang}", synthesize, [translated, 'transcribe'])
+    srt = graph.add(f"srt:{target_lang}", write_srt, [translated])
+    muxed = graph.add(f"mux:{target_lang}", mux, [translated, tts, srt, 'video'])
+    final = [graph.add(f"hls:{target_lang}", package, [muxed])] if hls else [muxed]
+    return graph.add(f"result:{target_lang}", respond, [translated] + final)
+
+def add_language_fanout(graph, job, target_langs, uid, burn_subs, soft_subs, hls=False):
+    """
+    Add the stages of every target language; they run in parallel with each other.
+
+    Returns the result stage of each language keyed by language code. A
+    single language keeps the old <uid>_* file names.
+    """
+    if len(target_langs) == 1:
+        return {target_langs[0]: add_language_stages(graph, job, target_langs[0], uid, burn_subs, soft_subs, hls)}
+    return {lang: add_language_stages(graph, job, lang, f"{uid}_{lang}", burn_subs, soft_subs, hls)
+            for lang in target_langs}
+
+def build_video_response(outputs, target_langs, **fields):
+    """Per-language results under 'languages'; a single language is also flattened."""
+    response = dict(fields)
+    if len(target_langs) == 1:
+        response.update(outputs[target_langs[0]])
+    response['languages'] = outputs
+    return response
+
+def start_job_download(job, youtube_url):
+    """
+    start_youtube_download() with checkpoints: the audio lands in the job
+    directory, and a retry reuses it (and the finished video) instead of
+    downloading again. Returns (audio_source, video_future, safe_title, source_id).
+    """
+    ckpt = job.checkpoint
+    downloaded = ckpt.outputs('download')
+    if downloaded and (ckpt.done('transcribe') or os.path.exists(downloaded['audio_source'])):
+        print("Resuming: download already done")
+        audio_source, video_title = downloaded['audio_source'], downloaded['video_title']
+        source_id = downloaded.get('source_id')
+        video_path = ckpt.outputs('video').get('path')
+        if video_path and os.path.exists(video_path):
+            video_future = Future()
+            video_future.set_result(video_path)
+        else:
+            video_future = _video_downloads.submit(lambda: download_youtube_video(youtube_url)[0])
+    else:
+        with timed_stage('download', job):
+            audio_source, video_future, video_title, video_id = start_youtube_download(youtube_url, ckpt.dir)
+        source_id = f"youtube:{video_id}"
+        ckpt.complete('download', audio_source=audio_source, video_title=video_title, source_id=source_id)
+    video_future.add_done_callback(
+        lambda f: f.exception() is None and ckpt.complete('video', path=f.result()))
+    return audio_source, video_future, video_title, source_id
+
+def segment_events(segments, translated=None):
+    """Segment id, timing and text for a job event; translated replaces the text."""
+    texts = [s['text'] for s in (translated or segments)]
+    return [{'id': s.get('id', i), 'start': s['start'], 'end': s['end'], 'text': text.strip()}
+            for i, (s, text) in enumerate(zip(segments, texts))]
+
+def transcribe_job_source(job, source, whisper_model, target_langs=(), source_id=None):
+    """
+    Extract and transcribe source for a job, checkpointing the decoded audio
+    and the transcript (with its duration) in the job directory.
+
+    source_id is a stable identity for the source (an upload's sha256, a
+    YouTube video ID). A source transcribed before with the same model is
+    served from the transcription cache without extracting its audio.
+
+    Segments are sent to the job's event stream as they are decoded. Each
+    chunk except the last is also translated into target_langs on a
+    background pool while Whisper goes on with the next one, which warms
+    the translation memory for the translate stages.
+    """
+    ckpt = job.checkpoint
+    streamed = []
+    early_translations = []
+
+    def translate_early(segments, lang, language):
+        try:
+            translated = translate_segments(segments, lang, language)
+        except Exception as e:
+            # Only a head start; the translate stage retries these segments
+            print(f"Early translation to {lang} failed:", e)
+            return
+        job.emit('translation', {'lang': lang, 'segments': segment_events(segments, translated)})
+
+    def on_segments(segments, final, language=None):
+        streamed.extend(segments)
+        job.emit('segments', {'segments': segment_events(segments)})
+        if final:
+            # The translate stages start now and translate the rest themselves
+            return
+        for lang in target_langs:
+            if same_language(language, lang):
+                continue
+            early_translations.append(_stream_translations.submit(translate_early, segments, lang, language))
+
+    def load_audio():
+        # Only a WAV is checkpointed. Piped audio isn't written to disk again: a
+        # retry decodes it from source, which the download stage keeps in the job
+        # directory (or is the upload), and that costs far less than the write
+        extracted = ckpt.outputs('extract_audio').get('path')
+        if extracted and os.path.exists(extracted):
+            print("Resuming: extract_audio already done")
+            return extracted
+        with timed_stage('extract_audio', job):
+            audio = prepare_audio(source, ckpt.path('audio.wav'))
+        if isinstance(audio, str):
+            ckpt.complete('extract_audio', path=audio)
+        return audio
+
+    def transcribe():
+        source_key = TranscriptionCache.key_for_source(source_id, whisper_model) if source_id else None
+        result = transcription_cache.get(source_key) if source_key else None
+        if result is not None:
+            print("Source already transcribed, skipping audio extraction and Whisper")
+            return dict(result, duration=probe_duration(source))
+        audio = load_audio()
+        result = transcribe_audio(audio, whisper_model, on_segments, job)
+        if source_key:
+            transcription_cache.put(source_key, result)
+        return dict(result, duration=audio_duration(audio))
+
+    result = ckpt.json_stage('transcribe', transcribe)
+    count('audio_seconds', result.get('duration'), job)
+    if not streamed:
+        # Single-pass Whisper, a cache hit or a resumed job: everything at once
+        on_segments(result.get('segments', []), True)
+    # Let the early translations land in the translation memory before the
+    # translate stages look those segments up
+    wait(early_translations)
+    return result
+
+def add_youtube_stages(graph, job, youtube_url, whisper_model, target_langs=()):
+    """
+    Add 'download', 'video' and 'transcribe' stages for a YouTube job.
+
+    'download' returns (audio_source, video_future, safe_title, source_id); transcription
+    starts on the audio while 'video' waits for the full video behind it.
+    """
+    def download():
+        print(f"Downloading YouTube video: {youtube_url}")
+        return start_job_download(job, youtube_url)
+
+    def wait_for_video(downloaded):
+        with timed_stage('download_wait', job):
+            return downloaded[1].result()
+
+    graph.add('download', download)
+    graph.add('video', wait_for_video, ['download'])
+    graph.add('transcribe', lambda downloaded: transcribe_job_source(job, downloaded[0], whisper_model, target_langs,
+                                                                     source_id=downloaded[3]),
+              ['download'])
+
+def run_youtube_pipeline(job, youtube_url, target_langs, burn_subs, uid, whisper_model=WHISPER_MODEL, soft_subs=False,
+                         hls=False):
+    """
+    Download a YouTube video once, then translate, dub and subtitle it per language.
+
+    Intermediate files live in the job's checkpoint directory until the job
+    succeeds; the downloaded video stays in the download cache.
+    """
+    # Download the audio first (the video keeps downloading behind transcription),
+    # transcribe it, then translate, dub, subtitle and mux every target language;
+    # the video download is only waited for at the mux
+    graph = StageGraph(job)
+    add_youtube_stages(graph, job, youtube_url, whisper_model, target_langs)
+    languages = add_language_fanout(graph, job, target_langs, uid, burn_subs, soft_subs, hls)
+    results = graph.run(progress=(0.05, 1.0))
+
+    return build_video_response({lang: results[stage] for lang, stage in languages.items()}, target_langs,
+                                video_title=results['download'][2],
+                                original_language=results['transcribe'].get('language', 'unknown'))
+
 @app.route('/process_youtube', methods=['POST'])
 def process_youtube_video():
     """
     Expected JSON data:
     - youtube_url: YouTube video URL
     - target_lang: language code for translation & TTS (e.g., hi for Hindi, mr for Marathi)
+    - target_langs: list of language codes (optional, e.g. ["hi", "ta", "or"]); the video
+      is downloaded and transcribed once and each language is rendered in parallel
     - burn_subs: boolean for burning subtitles into video
+    - soft_subs: boolean for embedding subtitles as a selectable track (no re-encode)
+    - hls: boolean for also packaging an HLS bitrate ladder with WebVTT subtitles
+    - whisper_model: Whisper model size (optional, defaults to WHISPER_MODEL)
+
+    Returns 202 with a job_id; poll /jobs/<job_id> for the result.
     """
     data = request.get_json()
     if not data:
         return jsonify({'error': 'No JSON data provided'}), 400
         
     youtube_url = data.get('youtube_url')
-    target_lang = data.get('target_lang', 'hi')  # default to Hindi
+    target_langs = parse_target_langs(data.get('target_langs') or data.get('target_lang'))  # default to Hindi
     burn_subs = data.get('burn_subs', False)
+    soft_subs = data.get('soft_subs', False)
+    hls = data.get('hls', False)
+    whisper_model = data.get('whisper_model', WHISPER_MODEL)
 
     if not youtube_url:
         return jsonify({'error': 'No YouTube URL provided'}), 400
+    if whisper_model not in model_registry.available():
+        return jsonify({'error': f'Unknown whisper_model: {whisper_model}'}), 400
 
     uid = str(uuid.uuid4())[:8]
+    return enqueue_job('process_youtube', run_youtube_pipeline, {
+        'youtube_url': youtube_url,
+        'target_langs': target_langs,
+        'burn_subs': burn_subs,
+        'soft_subs': soft_subs,
+        'hls': hls,
+        'whisper_model': whisper_model,
+        'uid': uid,
+    })
 
-    try:
-        # Step 1: Download YouTube video
-        print(f"Downloading YouTube video: {youtube_url}")
-        downloaded_path, video_title = download_youtube_video(youtube_url, UPLOAD_FOLDER)
-        
-        # Step 2: extract audio
-        audio_wav = os.path.join(UPLOAD_FOLDER, f"{uid}.wav")
-        extract_audio(downloaded_path, audio_wav)
-
-        # Step 3: transcribe using whisper
-        print("Transcribing audio with Whisper...")
-        result = model.transcribe(audio_wav, language=None)  # let model detect language
-        original_language = result.get('language', 'unknown')
-        full_text = result['text']
-        segments = result.get('segments', [])
-
-        # Step 4: translate text
-        print("Translating text to", target_lang)
-        translated_full = GoogleTranslator(source='auto', target=target_lang).translate(full_text)
-
-        # Translate segments individually (for subtitles)
-        translated_segments = []
-        for s in segments:
-            txt = s['text'].strip()
-            translated_txt = GoogleTranslator(source='auto', target=target_lang).translate(txt) if txt else ''
-            translated_segments.append({
-                'start': s['start'],
-                'end': s['end'],
-                'text': translated_txt
-            })
-
-        # Step 5: synthesize translated audio using gTTS
-        print("Synthesizing speech (gTTS)...")
-        tts = gTTS(text=translated_full, lang=target_lang)
-        tts_audio_path = os.path.join(OUTPUT_FOLDER, f"{uid}_tts.mp3")
-        tts.save(tts_audio_path)
-
-        # Step 6: replace original audio in video with the TTS audio
-        output_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_translated.mp4")
-        replace_audio(downloaded_path, tts_audio_path, output_video_path)
-
-        # Step 7: create subtitles file in target language
-        srt_path = os.path.join(OUTPUT_FOLDER, f"{uid}.srt")
-        segments_to_srt(translated_segments, srt_path)
-
-        # Optional: if user wants burned subtitles, create a burned video too
-        burned_video_path = None
-        if burn_subs:
-            burned_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_burned.mp4")
-            srt_abs = os.path.abspath(srt_path)
-            burn_subtitles(output_video_path, srt_abs, burned_video_path)
-
-        response = {
-            'video_title': video_title,
-            'original_language': original_language,
-            'translated_text_preview': (translated_full[:1000] + '...') if len(translated_full) > 1000 else translated_full,
-            'video_url': f"/static/{os.path.basename(output_video_path)}",
-            'srt_url': f"/static/{os.path.basename(srt_path)}"
-        }
-        if burned_video_path:
-            response['burned_video_url'] = f"/static/{os.path.basename(burned_video_path)}"
+def run_video_pipeline(job, input_path, target_langs, burn_subs, uid, whisper_model=WHISPER_MODEL, soft_subs=False,
+                       content_hash=None, hls=False):
+    """Transcribe an uploaded video once, then translate, dub and subtitle it per language."""
+    # Transcribe once, then translate, dub, subtitle and mux every target language.
+    # A chunked upload carries its sha256; a file seen before skips extraction and Whisper
+    graph = StageGraph(job)
+    graph.add('video', lambda: input_path)
+    graph.add('transcribe', lambda: transcribe_job_source(job, input_path, whisper_model, target_langs,
+                                                          source_id=content_hash))
+    languages = add_language_fanout(graph, job, target_langs, uid, burn_subs, soft_subs, hls)
+    results = graph.run(progress=(0.05, 1.0))
 
-        return jsonify(response)
-    except Exception as e:
-        print("Error processing YouTube video:", e)
-        return jsonify({'error': str(e)}), 500
-    finally:
-        # cleanup
-        try:
-            if os.path.exists(audio_wav):
-                os.remove(audio_wav)
-            # Optionally remove downloaded video to save space
-            # if os.path.exists(downloaded_path):
-            #     os.remove(downloaded_path)
-        except:
-            pass
+    # the transcript contains 'text' and 'segments'
+    return build_video_response({lang: results[stage] for lang, stage in languages.items()}, target_langs,
+                                original_language=results['transcribe'].get('language', 'unknown'))
 
 @app.route('/process', methods=['POST'])
 def process_video():
     """
     Expected form-data:
-    - file: uploaded video
+    - file: uploaded video, or
+    - upload_id: a completed chunked upload from /uploads (preferred for large files)
     - target_lang: language code for translation & TTS (e.g., hi for Hindi, mr for Marathi)
+    - target_langs: comma-separated language codes (optional, e.g. "hi,ta,or"); the video
+      is transcribed once and each language is rendered in parallel
     - burn_subs: "on" or not (optional)
+    - soft_subs: "on" or not (optional), embeds subtitles as a selectable track
+    - hls: "on" or not (optional), also packages an HLS bitrate ladder with WebVTT subtitles
+    - whisper_model: Whisper model size (optional, defaults to WHISPER_MODEL)
+
+    Returns 202 with a job_id; poll /jobs/<job_id> for the result.
     """
     file = request.files.get('file')
-    target_lang = request.form.get('target_lang', 'hi')  # default to Hindi
+    upload_id = request.form.get('upload_id')
+    target_langs = parse_target_langs(request.form.get('target_langs') or request.form.get('target_lang'))  # default to Hindi
     burn_subs = request.form.get('burn_subs', 'off') == 'on'
+    soft_subs = request.form.get('soft_subs', 'off') == 'on'
+    hls = request.form.get('hls', 'off') == 'on'
+    whisper_model = request.form.get('whisper_model', WHISPER_MODEL)
 
-    if not file:
+    if not file and not upload_id:
         return jsonify({'error': 'No file uploaded'}), 400
+    if whisper_model not in model_registry.available():
+        return jsonify({'error': f'Unknown whisper_model: {whisper_model}'}), 400
 
     uid = str(uuid.uuid4())[:8]
-    filename = f"{uid}_{file.filename}"
-    input_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(input_path)
+    content_hash = None
+    if upload_id:
+        upload = upload_manager.get(upload_id)
+        if not upload or upload['status'] != 'complete':
+            return jsonify({'error': 'Upload not found or not complete'}), 400
+        if not os.path.exists(upload['path']):
+            return jsonify({'error': 'Uploaded file has expired, please upload it again'}), 410
+        input_path = upload['path']
+        content_hash = upload['sha256']
+        storage.touch(input_path)
+    else:
+        filename = f"{uid}_{file.filename}"
+        input_path = os.path.join(UPLOAD_FOLDER, filename)
+        # The upload stream only lives as long as the request, so save it here
+        file.save(input_path)
+        storage.record(input_path)
 
-    try:
-        # Step 1: extract audio
-        audio_wav = os.path.join(UPLOAD_FOLDER, f"{uid}.wav")
-        extract_audio(input_path, audio_wav)
-
-        # Step 2: transcribe using whisper
-        # We request timestamps (word-level not exact; whisper gives segments)
-        print("Transcribing audio with Whisper...")
-        result = model.transcribe(audio_wav, language=None)  # let model detect language
-        # result contains 'text' and 'segments'
-        original_language = result.get('language', 'unknown')
-        full_text = result['text']
-        segments = result.get('segments', [])
-
-        # Step 3: translate text. We'll translate full_text and each segment for SRT timing.
-        print("Translating text to", target_lang)
-        translated_full = GoogleTranslator(source='auto', target=target_lang).translate(full_text)
-
-        # Translate segments individually (for subtitles)
-        translated_segments = []
-        for s in segments:
-            txt = s['text'].strip()
-            translated_txt = GoogleTranslator(source='auto', target=target_lang).translate(txt) if txt else ''
-            translated_segments.append({
-                'start': s['start'],
-                'end': s['end'],
-                'text': translated_txt
-            })
-
-        # Step 4: synthesize translated audio using gTTS
-        print("Synthesizing speech (gTTS)...")
-        tts = gTTS(text=translated_full, lang=target_lang)
-        tts_audio_path = os.path.join(OUTPUT_FOLDER, f"{uid}_tts.mp3")
-        tts.save(tts_audio_path)
-
-        # Convert mp3 to wav (optional) or keep mp3 — ffmpeg can use mp3 directly when replacing audio
-        # Step 5: replace original audio in video with the TTS audio
-        output_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_translated.mp4")
-        replace_audio(input_path, tts_audio_path, output_video_path)
-
-        # Step 6: create subtitles file in target language
-        srt_path = os.path.join(OUTPUT_FOLDER, f"{uid}.srt")
-        segments_to_srt(translated_segments, srt_path)
-
-        # Optional: if user wants burned subtitles, create a burned video too
-        burned_video_path = None
-        if burn_subs:
-            burned_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_burned.mp4")
-            # ffmpeg subtitles filter expects path without spaces or we can escape. Use absolute path.
-            srt_abs = os.path.abspath(srt_path)
-            # For Windows the subtitles filter can be picky; ensure proper escaping
-            burn_subtitles(output_video_path, srt_abs, burned_video_path)
+    return enqueue_job('process', run_video_pipeline, {
+        'input_path': input_path,
+        'target_langs': target_langs,
+        'burn_subs': burn_subs,
+        'soft_subs': soft_subs,
+        'hls': hls,
+        'whisper_model': whisper_model,
+        'uid': uid,
+        'content_hash': content_hash,
+    })
 
-        response = {
-            'original_language': original_language,
-            'translated_text_preview': (translated_full[:1000] + '...') if len(translated_full) > 1000 else translated_full,
-            'video_url': f"/static/{os.path.basename(output_video_path)}",
-            'srt_url': f"/static/{os.path.basename(srt_path)}"
-        }
-        if burned_video_path:
-            response['burned_video_url'] = f"/static/{os.path.basename(burned_video_path)}"
+def upload_response(upload, status=200):
+    fields = ('upload_id', 'filename', 'offset', 'total_size', 'sha256', 'status', 'duplicate')
+    return jsonify({k: upload[k] for k in fields if k in upload}), status
 
-        return jsonify(response)
-    except Exception as e:
-        print("Error processing:", e)
-        return jsonify({'error': str(e)}), 500
-    finally:
-        # cleanup extracted audio to save space
-        try:
-            if os.path.exists(audio_wav):
-                os.remove(audio_wav)
-        except:
-            pass
+def upload_error(e):
+    body = {'error': str(e)}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """
+    Start a resumable upload.
+
+    Expected JSON data:
+    - filename: original file name
+    - size: total size in bytes (optional; completion is refused until it is reached)
+    - sha256: content hash if the client has it (optional); a known hash
+      completes the upload immediately without sending any bytes
+
+    Then PUT the file in chunks to /uploads/<upload_id> with an
+    X-Upload-Offset header (or Content-Range), and POST
+    /uploads/<upload_id>/complete. After a dropped connection, GET
+    /uploads/<upload_id> returns the offset to resume from.
+    """
+    data = request.get_json(silent=True) or {}
+    size = data.get('size')
+    if size is not None and (isinstance(size, bool) or not str(size).isdigit()):
+        return jsonify({'error': 'size must be a whole number of bytes'}), 400
+    upload = upload_manager.create(data.get('filename'), int(size) if size is not None else None, data.get('sha256'))
+    return upload_response(upload, 201)
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    upload = upload_manager.get(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    return upload_response(upload)
+
+@app.route('/uploads/<upload_id>', methods=['PUT', 'PATCH'])
+def upload_chunk(upload_id):
+    offset = request.headers.get('X-Upload-Offset')
+    content_range = re.match(r'bytes (\d+)-\d+/(\d+|\*)', request.headers.get('Content-Range', ''))
+    if offset is None and content_range:
+        offset = content_range.group(1)
+    if offset is None or not str(offset).isdigit():
+        return jsonify({'error': 'X-Upload-Offset or Content-Range header required'}), 400
+    try:
+        # Read the raw body stream so the chunk never sits in memory as a whole
+        new_offset = upload_manager.append(upload_id, int(offset), request.stream, request.content_length)
+    except UploadError as e:
+        return upload_error(e)
+    return jsonify({'upload_id': upload_id, 'offset': new_offset})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    try:
+        upload = upload_manager.complete(upload_id)
+    except UploadError as e:
+        return upload_error(e)
+    if upload['duplicate']:
+        print(f"Upload {upload_id} matches an earlier upload, reusing {upload['path']}")
+        storage.touch(upload['path'])
+    else:
+        storage.record(upload['path'])
+    return upload_response(upload)
 
 @app.route('/process_educational', methods=['POST'])
 def process_educational_content():
@@ -550,16 +1206,19 @@ def process_educational_content():
     
     try:
         # Process educational content
-        result = localize_educational_content(transcript_text, region_id, lang_code)
+        with timed_stage('localize'):
+            result = localize_educational_content(transcript_text, region_id, lang_code)
         
         # Generate TTS audio for the localized content
         uid = str(uuid.uuid4())[:8]
-        tts = gTTS(text=result["tts_ready_text"], lang=lang_code)
         tts_audio_path = os.path.join(OUTPUT_FOLDER, f"educational_{uid}.mp3")
-        tts.save(tts_audio_path)
+        with timed_stage('tts'):
+            synthesize_to_file(result["tts_ready_text"], lang_code, tts_audio_path)
+        count('synthesized_characters', len(result["tts_ready_text"]), lang=lang_code)
         
         # Add audio URL to result
         result['audio_url'] = f"/static/{os.path.basename(tts_audio_path)}"
+        storage.record(tts_audio_path)
         
         return jsonify(result)
         
@@ -567,6 +1226,97 @@ def process_educational_content():
         print("Error processing educational content:", e)
         return jsonify({'error': str(e)}), 500
 
+def run_youtube_educational_pipeline(job, youtube_url, region_id, target_lang, burn_subs, uid, whisper_model=WHISPER_MODEL,
+                                     soft_subs=False, hls=False):
+    """Download a YouTube video and replace its narration with a localized lesson."""
+    ckpt = job.checkpoint
+    tts_audio_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational_tts.mp3")
+    srt_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational.srt")
+    output_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational.mp4")
+    burned_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational_burned.mp4") if burn_subs else None
+    hls_dir = os.path.join(OUTPUT_FOLDER, f"{uid}_educational_hls")
+
+    # Educational localization
+    def localize(transcript):
+        def compute():
+            print("Applying educational localization...")
+            with timed_stage('localize', job):
+                return localize_educational_content(transcript['text'], region_id, target_lang)
+
+        return ckpt.json_stage('localize', compute)
+
+    # Synthesize the localized TTS-ready text
+    def synthesize(educational_content):
+        localized_text = educational_content["tts_ready_text"]
+
+        def compute():
+            print(f"Synthesizing educational speech ({get_speech_engine().name})...")
+            with timed_stage('tts', job):
+                synthesize_to_file(localized_text, target_lang, tts_audio_path)
+            count('synthesized_characters', len(localized_text), job, lang=target_lang)
+            count('bytes_written', artifact_size(tts_audio_path), job, stage='tts')
+
+        ckpt.file_stage('tts', [tts_audio_path], compute)
+
+    # Create educational subtitles
+    # For simplicity, use the localized text as one subtitle block
+    def write_srt(educational_content):
+        localized_text = educational_content["tts_ready_text"]
+        segments_to_srt([{
+            'start': 0,
+            'end': len(localized_text.split()) * 0.5,  # rough timing estimate
+            'text': localized_text
+        }], srt_path)
+
+    # Replace original audio in video with the educational TTS audio;
+    # burned subtitles (if requested) come out of the same ffmpeg pass
+    def mux(_tts, _srt, downloaded_path):
+        def compute():
+            with timed_stage('mux', job):
+                replace_audio(downloaded_path, tts_audio_path, output_video_path, srt_path=srt_path,
+                              soft_subs=soft_subs, burned_video=burned_video_path, subtitle_lang=target_lang)
+            count('bytes_written', sum(artifact_size(p) for p in (srt_path, output_video_path, burned_video_path) if p),
+                  job, stage='mux')
+
+        ckpt.file_stage('mux', [srt_path, output_video_path, burned_video_path], compute)
+
+    def package(_mux):
+        def compute():
+            with timed_stage('hls', job):
+                package_stream(output_video_path, srt_path, target_lang, f"{uid}_educational", job.id)
+            count('bytes_written', artifact_size(hls_dir), job, stage='hls')
+
+        ckpt.file_stage('hls', [os.path.join(hls_dir, 'master.m3u8')], compute)
+
+    graph = StageGraph(job)
+    add_youtube_stages(graph, job, youtube_url, whisper_model)
+    graph.add('localize', localize, ['transcribe'])
+    graph.add('tts', synthesize, ['localize'])
+    graph.add('srt', write_srt, ['localize'])
+    graph.add('mux', mux, ['tts', 'srt', 'video'])
+    if hls:
+        graph.add('hls', package, ['mux'])
+    results = graph.run(progress=(0.05, 1.0))
+
+    response = {
+        'video_title': results['download'][2],
+        'original_language': results['transcribe'].get('language', 'unknown'),
+        'region_id': region_id,
+        'educational_content': results['localize'],
+        'video_url': f"/static/{os.path.basename(output_video_path)}",
+        'srt_url': f"/static/{os.path.basename(srt_path)}",
+        'audio_url': f"/static/{os.path.basename(tts_audio_path)}"
+    }
+    
+    if burned_video_path:
+        response['burned_video_url'] = f"/static/{os.path.basename(burned_video_path)}"
+    for path in (tts_audio_path, srt_path, output_video_path, burned_video_path):
+        storage.record(path, job.id)
+    if hls:
+        response['hls_url'] = f"/static/{uid}_educational_hls/master.m3u8"
+
+    return response
+
 @app.route('/process_youtube_educational', methods=['POST'])
 def process_youtube_educational():
     """
@@ -576,6 +1326,11 @@ def process_youtube_educational():
     - region_id: Region identifier 
     - target_lang: language code for translation & TTS
     - burn_subs: boolean for burning subtitles into video
+    - soft_subs: boolean for embedding subtitles as a selectable track (no re-encode)
+    - hls: boolean for also packaging an HLS bitrate ladder with WebVTT subtitles
+    - whisper_model: Whisper model size (optional, defaults to WHISPER_MODEL)
+
+    Returns 202 with a job_id; poll /jobs/<job_id> for the result.
     """
     data = request.get_json()
     if not data:
@@ -585,88 +1340,97 @@ def process_youtube_educational():
     region_id = data.get('region_id', 'odisha')
     target_lang = data.get('target_lang', 'hi')
     burn_subs = data.get('burn_subs', False)
+    soft_subs = data.get('soft_subs', False)
+    hls = data.get('hls', False)
+    whisper_model = data.get('whisper_model', WHISPER_MODEL)
 
     if not youtube_url:
         return jsonify({'error': 'No YouTube URL provided'}), 400
+    if whisper_model not in model_registry.available():
+        return jsonify({'error': f'Unknown whisper_model: {whisper_model}'}), 400
 
     uid = str(uuid.uuid4())[:8]
+    return enqueue_job('process_youtube_educational', run_youtube_educational_pipeline, {
+        'youtube_url': youtube_url,
+        'region_id': region_id,
+        'target_lang': target_lang,
+        'burn_subs': burn_subs,
+        'soft_subs': soft_subs,
+        'hls': hls,
+        'whisper_model': whisper_model,
+        'uid': uid,
+    })
 
-    try:
-        # Step 1: Download YouTube video
-        print(f"Downloading YouTube video: {youtube_url}")
-        downloaded_path, video_title = download_youtube_video(youtube_url, UPLOAD_FOLDER)
-        
-        # Step 2: extract audio
-        audio_wav = os.path.join(UPLOAD_FOLDER, f"{uid}.wav")
-        extract_audio(downloaded_path, audio_wav)
-
-        # Step 3: transcribe using whisper
-        print("Transcribing audio with Whisper...")
-        result = model.transcribe(audio_wav, language=None)
-        original_language = result.get('language', 'unknown')
-        full_text = result['text']
-        segments = result.get('segments', [])
-
-        # Step 4: Educational localization
-        print("Applying educational localization...")
-        educational_content = localize_educational_content(full_text, region_id, target_lang)
-        
-        # Use the localized TTS-ready text for speech synthesis
-        localized_text = educational_content["tts_ready_text"]
+@app.route('/process_batch', methods=['POST'])
+def process_batch():
+    """
+    Process a YouTube playlist or a list of YouTube URLs as one batch.
+    Expected JSON data:
+    - playlist_url: YouTube playlist URL, and/or
+    - urls: list of YouTube video URLs
+    - mode: "educational" (default, /process_youtube_educational per video and language)
+      or "translate" (/process_youtube per video, all target languages in one job)
+    - region_id: Region identifier (educational mode)
+    - target_lang / target_langs: language code(s) for translation & TTS
+    - burn_subs, soft_subs, hls, whisper_model: as for the single-video routes
+    - concurrency: videos processed at the same time (optional, defaults to BATCH_CONCURRENCY)
 
-        # Step 5: synthesize localized audio using gTTS
-        print("Synthesizing educational speech (gTTS)...")
-        tts = gTTS(text=localized_text, lang=target_lang)
-        tts_audio_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational_tts.mp3")
-        tts.save(tts_audio_path)
+    Returns 202 with a batch_id; GET /batches/<batch_id> for the aggregated manifest.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No JSON data provided'}), 400
 
-        # Step 6: replace original audio in video with the educational TTS audio
-        output_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational.mp4")
-        replace_audio(downloaded_path, tts_audio_path, output_video_path)
+    playlist_url = data.get('playlist_url')
+    urls = data.get('urls') or []
+    mode = data.get('mode', 'educational')
+    target_langs = parse_target_langs(data.get('target_langs') or data.get('target_lang'))  # default to Hindi
+    whisper_model = data.get('whisper_model', WHISPER_MODEL)
 
-        # Step 7: create educational subtitles
-        # For simplicity, use the localized text as one subtitle block
-        educational_segments = [{
-            'start': 0,
-            'end': len(localized_text.split()) * 0.5,  # rough timing estimate
-            'text': localized_text
-        }]
-        
-        srt_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational.srt")
-        segments_to_srt(educational_segments, srt_path)
+    if isinstance(urls, str):
+        urls = urls.split()
+    if not playlist_url and not urls:
+        return jsonify({'error': 'No playlist_url or urls provided'}), 400
+    if mode not in ('educational', 'translate'):
+        return jsonify({'error': f'Unknown mode: {mode}'}), 400
+    if whisper_model not in model_registry.available():
+        return jsonify({'error': f'Unknown whisper_model: {whisper_model}'}), 400
 
-        # Optional: burn subtitles
-        burned_video_path = None
-        if burn_subs:
-            burned_video_path = os.path.join(OUTPUT_FOLDER, f"{uid}_educational_burned.mp4")
-            srt_abs = os.path.abspath(srt_path)
-            burn_subtitles(output_video_path, srt_abs, burned_video_path)
+    params = {
+        'burn_subs': data.get('burn_subs', False),
+        'soft_subs': data.get('soft_subs', False),
+        'hls': data.get('hls', False),
+        'whisper_model': whisper_model,
+    }
+    if mode == 'educational':
+        kind = 'process_youtube_educational'
+        params['region_id'] = data.get('region_id', 'odisha')
+        per_item_langs = target_langs
+    else:
+        kind = 'process_youtube'
+        params['target_langs'] = target_langs
+        per_item_langs = None
 
-        response = {
-            'video_title': video_title,
-            'original_language': original_language,
-            'region_id': region_id,
-            'educational_content': educational_content,
-            'video_url': f"/static/{os.path.basename(output_video_path)}",
-            'srt_url': f"/static/{os.path.basename(srt_path)}",
-            'audio_url': f"/static/{os.path.basename(tts_audio_path)}"
-        }
-        
-        if burned_video_path:
-            response['burned_video_url'] = f"/static/{os.path.basename(burned_video_path)}"
+    try:
+        batch = batch_manager.submit(Batch(kind, PIPELINES[kind], params, urls=urls, playlist_url=playlist_url,
+                                           target_langs=per_item_langs,
+                                           concurrency=data.get('concurrency', BATCH_CONCURRENCY)))
+    except (BatchError, ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'batch_id': batch.id,
+        'status': batch.status,
+        'items': len(batch.items),
+        'status_url': f"/batches/{batch.id}"
+    }), 202
 
-        return jsonify(response)
-        
-    except Exception as e:
-        print("Error processing educational YouTube video:", e)
-        return jsonify({'error': str(e)}), 500
-    finally:
-        # cleanup
-        try:
-            if os.path.exists(audio_wav):
-                os.remove(audio_wav)
-        except:
-            pass
+@app.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """Aggregated manifest of a batch: one entry per item with its job_id, status and result."""
+    batch = batch_manager.get(batch_id)
+    if not batch:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(batch)
 
 @app.route('/localize_educational_content', methods=['POST'])
 def localize_educational_content_api():
@@ -730,5 +1494,12 @@ def localize_educational_content_api():
         return jsonify({'error': str(e)}), 500
 
 # serve static output files automatically (Flask does this from 'static' folder)
+# Pipeline of each job kind, for resuming jobs from their manifest
+PIPELINES = {
+    'process': run_video_pipeline,
+    'process_youtube': run_youtube_pipeline,
+    'process_youtube_educational': run_youtube_educational_pipeline,
+}
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=3050, debug=True)
\ No newline at end of file
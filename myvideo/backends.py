@@ -0,0 +1,172 @@
+"""
+Pluggable translation and speech synthesis backends.
+
+The pipeline talks to one translator and one speech engine, picked by
+TRANSLATOR_BACKEND and TTS_BACKEND. The Google services (deep_translator
+and gTTS) are the defaults; the offline options run on this machine:
+
+    TRANSLATOR_BACKEND=marian   MarianMT (Helsinki-NLP opus-mt) via transformers
+    TTS_BACKEND=espeak          espeak-ng command line
+    TTS_BACKEND=piper           piper command line with a voice per language
+
+Each backend's dependency is only imported when that backend is used.
+"""
+import glob
+import os
+import subprocess
+import tempfile
+import threading
+
+TRANSLATOR_BACKEND = os.getenv("TRANSLATOR_BACKEND", "google")
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+
+# MarianMT models are per language pair; Whisper transcripts are assumed to
+# be in TRANSLATION_SOURCE_LANG when their language wasn't detected
+MARIAN_MODEL_TEMPLATE = os.getenv("MARIAN_MODEL_TEMPLATE", "Helsinki-NLP/opus-mt-{source}-{target}")
+TRANSLATION_SOURCE_LANG = os.getenv("TRANSLATION_SOURCE_LANG", "en")
+MARIAN_BATCH_SIZE = int(os.getenv("MARIAN_BATCH_SIZE", "16"))
+
+ESPEAK_BINARY = os.getenv("ESPEAK_BINARY", "espeak-ng")
+PIPER_BINARY = os.getenv("PIPER_BINARY", "piper")
+# Folder of piper voices named like hi_IN-<voice>-medium.onnx
+PIPER_VOICE_DIR = os.getenv("PIPER_VOICE_DIR", "voices")
+
+
+class GoogleTranslate:
+    name = "google"
+
+    def translate(self, text, target_lang, source_lang='auto'):
+        from deep_translator import GoogleTranslator
+        from deep_translator.exceptions import LanguageNotSupportedException
+        try:
+            translator = GoogleTranslator(source=source_lang, target=target_lang)
+        except LanguageNotSupportedException:
+            # Whisper's code isn't Google's (e.g. "zh", "he"); let Google detect it
+            translator = GoogleTranslator(source='auto', target=target_lang)
+        return translator.translate(text) or ''
+
+
+class MarianTranslate:
+    """
+    Local MarianMT models, loaded once per language pair.
+
+    Each input line is translated as its own sentence, so the batched
+    newline-joined requests from translation.py keep their line count.
+    """
+    name = "marian"
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _load(self, source, target):
+        model_name = MARIAN_MODEL_TEMPLATE.format(source=source, target=target)
+        with self._lock:
+            if model_name not in self._models:
+                from transformers import MarianMTModel, MarianTokenizer
+                print("Loading translation model:", model_name)
+                self._models[model_name] = (
+                    MarianTokenizer.from_pretrained(model_name),
+                    MarianMTModel.from_pretrained(model_name).eval(),
+                    threading.Lock(),
+                )
+            return self._models[model_name]
+
+    def translate(self, text, target_lang, source_lang='auto'):
+        source = TRANSLATION_SOURCE_LANG if source_lang in (None, 'auto') else source_lang
+        tokenizer, model, model_lock = self._load(source, target_lang)
+        lines = text.split('\n')
+        out = [''] * len(lines)
+        todo = [i for i, line in enumerate(lines) if line.strip()]
+        import torch
+        # One generate() at a time per model; it already uses every core
+        with model_lock, torch.no_grad():
+            for start in range(0, len(todo), MARIAN_BATCH_SIZE):
+                idxs = todo[start:start + MARIAN_BATCH_SIZE]
+                batch = tokenizer([lines[i] for i in idxs], return_tensors='pt', padding=True, truncation=True)
+                generated = model.generate(**batch)
+                for i, translated in zip(idxs, tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                    out[i] = translated
+        return '\n'.join(out)
+
+
+class GTTSEngine:
+    name = "gtts"
+
+    def synthesize(self, text, lang, output_path):
+        from gtts import gTTS
+        gTTS(text=text, lang=lang).save(output_path)
+
+
+def _wav_to_mp3(wav_path, output_path):
+    subprocess.run(['ffmpeg', '-y', '-v', 'error', '-i', wav_path,
+                    '-ac', '1', '-c:a', 'libmp3lame', '-q:a', '4', '-f', 'mp3', output_path], check=True)
+
+
+class EspeakEngine:
+    name = "espeak"
+
+    def synthesize(self, text, lang, output_path):
+        fd, wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            # Text goes in on stdin so long narration isn't limited by argv
+            subprocess.run([ESPEAK_BINARY, '-v', lang, '--stdin', '-w', wav_path],
+                           input=text.encode('utf-8'), check=True)
+            _wav_to_mp3(wav_path, output_path)
+        finally:
+            os.remove(wav_path)
+
+
+class PiperEngine:
+    name = "piper"
+
+    def voice_for(self, lang):
+        voices = sorted(glob.glob(os.path.join(PIPER_VOICE_DIR, f"{lang}_*.onnx")))
+        if not voices:
+            raise ValueError(f"No piper voice for '{lang}' in {PIPER_VOICE_DIR}")
+        return voices[0]
+
+    def synthesize(self, text, lang, output_path):
+        fd, wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        try:
+            subprocess.run([PIPER_BINARY, '--model', self.voice_for(lang), '--output_file', wav_path],
+                           input=text.encode('utf-8'), check=True, stdout=subprocess.DEVNULL)
+            _wav_to_mp3(wav_path, output_path)
+        finally:
+            os.remove(wav_path)
+
+
+TRANSLATORS = {
+    'google': GoogleTranslate,
+    'marian': MarianTranslate,
+}
+SPEECH_ENGINES = {
+    'gtts': GTTSEngine,
+    'espeak': EspeakEngine,
+    'piper': PiperEngine,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _get(registry, name):
+    if name not in registry:
+        raise ValueError(f"Unknown backend '{name}'. Choose from: {', '.join(registry)}")
+    with _instances_lock:
+        key = (id(registry), name)
+        if key not in _instances:
+            _instances[key] = registry[name]()
+        return _instances[key]
+
+
+def get_translator(name=None):
+    """The configured translator (one shared instance per backend)."""
+    return _get(TRANSLATORS, name or TRANSLATOR_BACKEND)
+
+
+def get_speech_engine(name=None):
+    """The configured speech engine (one shared instance per backend)."""
+    return _get(SPEECH_ENGINES, name or TTS_BACKEND)
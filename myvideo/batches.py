@@ -0,0 +1,216 @@
+"""
+Batch processing of many YouTube videos (a playlist or a list of URLs).
+
+A batch is a coordinator thread that feeds ordinary pipeline jobs to the
+job queue, at most `concurrency` at a time, so every item still has its
+own /jobs/<job_id> status and event stream. Items for the same video run
+one after another: the first one downloads and transcribes it, and the
+others (further target languages) hit the download cache and the
+transcription cache, which is keyed by video ID whichever stream was
+decoded, instead of repeating that work next to it. When every item has
+finished, the aggregated manifest is written to <batch_id>_batch.json.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from jobs import QueueFullError
+
+# Items of one batch running at the same time, by default and at most
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+# Videos (times target languages) accepted in one batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Wait before submitting again when the job queue is full
+BATCH_QUEUE_FULL_RETRY_SECONDS = float(os.getenv("BATCH_QUEUE_FULL_RETRY_SECONDS", "10"))
+# Finished batches are forgotten after this many seconds (the manifest file stays)
+BATCH_RETENTION_SECONDS = int(os.getenv("BATCH_RETENTION_SECONDS", str(24 * 3600)))
+
+FINISHED = ("done", "failed")
+
+
+class BatchError(Exception):
+    """Raised for a batch request that can't be scheduled."""
+
+
+def expand_youtube_playlist(url):
+    """Video URLs of a YouTube playlist, without fetching each video's metadata."""
+    import yt_dlp
+    with yt_dlp.YoutubeDL({'extract_flat': 'in_playlist', 'quiet': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    entries = info.get('entries') or [info]
+    return [e.get('webpage_url') or e.get('url') or f"https://www.youtube.com/watch?v={e['id']}"
+            for e in entries if e]
+
+
+class Batch:
+    def __init__(self, kind, func, params, urls=None, playlist_url=None, target_langs=None,
+                 concurrency=BATCH_CONCURRENCY):
+        self.id = "batch-" + str(uuid.uuid4())[:8]
+        self.kind = kind
+        self.func = func
+        self.params = params
+        self.urls = list(urls or [])
+        self.playlist_url = playlist_url
+        # Educational items are one job per (video, language); None keeps one job per video
+        self.target_langs = target_langs
+        self.concurrency = max(1, min(int(concurrency), BATCH_MAX_CONCURRENCY))
+        self.status = "expanding" if playlist_url else "queued"  # -> running -> done / failed
+        self.error = None
+        self.items = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self.manifest_url = None
+
+    def add_items(self, urls):
+        urls = list(dict.fromkeys(u.strip() for u in urls if u and u.strip()))
+        langs = self.target_langs or [None]
+        if len(urls) * len(langs) > BATCH_MAX_ITEMS:
+            raise BatchError(f"Batch has {len(urls) * len(langs)} items, the limit is {BATCH_MAX_ITEMS}")
+        for url in urls:
+            first = None
+            for lang in langs:
+                self.items.append({
+                    'index': len(self.items),
+                    'url': url,
+                    'target_lang': lang,
+                    # Wait for the first item of the same video so it's downloaded and transcribed once
+                    'after': first,
+                    'job_id': None,
+                    'status': "pending",
+                })
+                if first is None:
+                    first = len(self.items) - 1
+
+    def item_params(self, item):
+        params = dict(self.params, youtube_url=item['url'], uid=str(uuid.uuid4())[:8])
+        if item['target_lang'] is not None:
+            params['target_lang'] = item['target_lang']
+        return params
+
+    def to_dict(self):
+        counts = {}
+        for item in self.items:
+            counts[item['status']] = counts.get(item['status'], 0) + 1
+        return {
+            'batch_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'playlist_url': self.playlist_url,
+            'params': self.params,
+            'target_langs': self.target_langs,
+            'concurrency': self.concurrency,
+            'counts': counts,
+            'items': [{k: v for k, v in item.items() if k != 'after'} for item in self.items],
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'manifest_url': self.manifest_url,
+            'error': self.error,
+        }
+
+
+class BatchManager:
+    def __init__(self, job_queue, manifest_folder, storage=None, expand_playlist=expand_youtube_playlist):
+        self.job_queue = job_queue
+        self.expand_playlist = expand_playlist
+        self.manifest_folder = manifest_folder
+        self.storage = storage
+        self.batches = {}
+        self._cond = threading.Condition()
+
+    def submit(self, batch):
+        """Start scheduling batch in the background; returns it straight away."""
+        if not batch.playlist_url:
+            batch.add_items(batch.urls)
+            if not batch.items:
+                raise BatchError("No URLs to process")
+        with self._cond:
+            self._expire_finished()
+            self.batches[batch.id] = batch
+        threading.Thread(target=self._run, args=(batch,), name=batch.id, daemon=True).start()
+        return batch
+
+    def get(self, batch_id):
+        """The batch manifest: live while it runs, then from its file once forgotten."""
+        with self._cond:
+            batch = self.batches.get(batch_id)
+            if batch:
+                return batch.to_dict()
+        path = os.path.join(self.manifest_folder, f"{os.path.basename(batch_id)}_batch.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self, batch):
+        status, error = "done", None
+        try:
+            if batch.playlist_url:
+                print(f"[{batch.id}] Expanding playlist: {batch.playlist_url}")
+                urls = self.expand_playlist(batch.playlist_url)
+                with self._cond:
+                    batch.add_items(batch.urls + urls)
+            with self._cond:
+                batch.status = "running"
+                self._schedule(batch)
+        except Exception as e:
+            print(f"Error in {batch.id}:", e)
+            status, error = "failed", str(e)
+        finally:
+            # The manifest is on disk by the time the batch reports itself finished
+            with self._cond:
+                batch.status, batch.error = status, error
+                batch.finished_at = time.time()
+                self._write_manifest(batch)
+
+    def _schedule(self, batch):
+        # Runs with self._cond held; waiting releases it for the job callbacks
+        pending = list(batch.items)
+        running = 0
+        while pending or running:
+            ready = [item for item in pending
+                     if item['after'] is None or batch.items[item['after']]['status'] in FINISHED]
+            if not ready or running >= batch.concurrency:
+                self._cond.wait()
+                running = sum(1 for item in batch.items if item['status'] in ("queued", "running"))
+                continue
+            item = ready[0]
+            try:
+                job = self.job_queue.submit(batch.kind, batch.func, batch.item_params(item),
+                                            on_done=lambda job, item=item: self._item_done(item, job))
+            except QueueFullError:
+                self._cond.wait(BATCH_QUEUE_FULL_RETRY_SECONDS)
+                continue
+            pending.remove(item)
+            item['job_id'] = job.id
+            item['status'] = "queued"
+            running += 1
+
+    def _item_done(self, item, job):
+        with self._cond:
+            item['status'] = job.status
+            if job.result is not None:
+                item['result'] = job.result
+            if job.error is not None:
+                item['error'] = job.error
+            self._cond.notify_all()
+
+    def _write_manifest(self, batch):
+        path = os.path.join(self.manifest_folder, f"{batch.id}_batch.json")
+        batch.manifest_url = f"/static/{os.path.basename(path)}"
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(batch.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        if self.storage is not None:
+            self.storage.record(path, batch.id)
+
+    def _expire_finished(self):
+        cutoff = time.time() - BATCH_RETENTION_SECONDS
+        expired = [batch_id for batch_id, b in self.batches.items()
+                   if b.finished_at is not None and b.finished_at < cutoff]
+        for batch_id in expired:
+            del self.batches[batch_id]
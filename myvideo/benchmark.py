@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the video translation pipeline.
+
+Generates synthetic test videos of several lengths with ffmpeg's lavfi
+sources, replaces the Google translator and gTTS with local fakes, and runs
+run_video_pipeline() directly (no server) on each video. Per-stage timings
+come from the pipeline's own metrics; the report adds end-to-end wall time
+and throughput, and can be compared against a stored baseline.
+
+Usage:
+    python benchmark.py                                  # 10 s, 60 s, 300 s videos, 3 runs each
+    python benchmark.py --lengths 30,120 --repeat 5 --output report.json
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json   # exit code 2 on a regression
+
+Exit codes: 0 ok, 2 regression against the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MEDIA_DIR = os.path.join(tempfile.gettempdir(), "myvideo-bench-media")
+# A stage only counts as regressed if it is this much slower in absolute terms too
+MIN_REGRESSION_SECONDS = 0.05
+REPORT_VERSION = 1
+
+
+def generate_video(path, seconds, size="640x360", rate=25):
+    """Write a deterministic test pattern video with a tone track."""
+    command = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={rate}',
+        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', path
+    ]
+    subprocess.run(command, check=True)
+    return path
+
+
+def media_for(length, media_dir, size):
+    """Generated videos are reused across benchmark invocations."""
+    os.makedirs(media_dir, exist_ok=True)
+    path = os.path.join(media_dir, f"bench_{length}s_{size}.mp4")
+    if not os.path.exists(path):
+        print(f"Generating {length}s test video...")
+        tmp_path = path + ".tmp.mp4"
+        generate_video(tmp_path, length, size)
+        os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_transcript(duration, seconds_per_segment=5.0):
+    """Deterministic segments covering duration, for runs where Whisper hears no speech."""
+    segments = []
+    start = 0.0
+    i = 0
+    while start < duration:
+        end = min(start + seconds_per_segment, duration)
+        segments.append({'start': start, 'end': end,
+                         'text': f"This is synthetic benchmark sentence number {i} about gravity and motion."})
+        start = end
+        i += 1
+    return {'text': ' '.join(s['text'] for s in segments), 'language': 'en', 'segments': segments}
+
+
+class FakeTranslator:
+    """Translator backend that tags every line, keeping the line count."""
+
+    name = "fake"
+    latency = 0.0
+
+    def translate(self, text, target_lang, source_lang='auto'):
+        if self.latency:
+            time.sleep(self.latency)
+        return '\n'.join(f"[{target_lang}] {line}" for line in text.split('\n'))
+
+
+def make_fake_tts(clip_path, latency=0.0):
+    class FakeSpeech:
+        """Speech backend where every clip is a copy of one pre-rendered tone."""
+
+        name = "fake"
+
+        def synthesize(self, text, lang, output_path):
+            if latency:
+                time.sleep(latency)
+            shutil.copyfile(clip_path, output_path)
+
+    return FakeSpeech
+
+
+def install_fakes(work_dir, args):
+    """Patch the network-bound backends and point every cache at work_dir."""
+    import app
+    import backends
+    import translation
+    import tts
+    from cache import TranscriptionCache, TTSCache
+    from translation_memory import TranslationMemory
+
+    FakeTranslator.latency = args.translate_latency
+    backends.TRANSLATORS['fake'] = FakeTranslator
+    backends.TRANSLATOR_BACKEND = args.translator
+
+    clip_path = os.path.join(work_dir, "fake_tts.mp3")
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', 'sine=frequency=220:sample_rate=24000',
+        '-t', '1', '-ac', '1', '-c:a', 'libmp3lame', clip_path
+    ], check=True)
+    backends.SPEECH_ENGINES['fake'] = make_fake_tts(clip_path, args.tts_latency)
+    backends.TTS_BACKEND = args.tts
+
+    real_transcribe = app.transcribe_audio
+
+    def transcribe(audio, whisper_model=app.WHISPER_MODEL, on_segments=None, job=None):
+        duration = app.audio_duration(audio) or 0.0
+        if args.fake_whisper:
+            return synthetic_transcript(duration)
+        result = real_transcribe(audio, whisper_model, on_segments, job)
+        if not result.get('segments'):
+            # Test tones carry no speech; give the later stages the same work every time
+            result = dict(synthetic_transcript(duration), language=result.get('language', 'en'))
+        return result
+
+    app.transcribe_audio = transcribe
+
+    def reset_caches(run_dir):
+        app.transcription_cache = TranscriptionCache(folder=os.path.join(run_dir, "transcripts"))
+        tts.tts_cache = TTSCache(folder=os.path.join(run_dir, "tts"))
+        translation.translation_memory = TranslationMemory(path=os.path.join(run_dir, "translation_memory.db"))
+
+    return app, reset_caches
+
+
+def run_once(app, input_path, args, uid):
+    from jobs import Job
+
+    params = {
+        'input_path': input_path,
+        'target_langs': args.langs,
+        'burn_subs': args.burn_subs,
+        'soft_subs': args.soft_subs,
+        'whisper_model': args.whisper_model,
+        'uid': uid,
+    }
+    job = Job('benchmark', params)
+    start = time.perf_counter()
+    app.run_video_pipeline(job, **params)
+    wall = time.perf_counter() - start
+    job_metrics = job.metrics()
+    audio_seconds = job_metrics['counters'].get('audio_seconds', 0.0)
+    return {
+        'wall_seconds': round(wall, 3),
+        'realtime_factor': round(audio_seconds / wall, 3) if wall else None,
+        'stage_seconds': job_metrics['stage_seconds'],
+        'counters': job_metrics['counters'],
+        'critical_path': job_metrics.get('critical_path'),
+    }
+
+
+def summarize(runs):
+    summary = {}
+    for length in sorted({r['length'] for r in runs}):
+        group = [r for r in runs if r['length'] == length]
+        stages = sorted({s for r in group for s in r['stage_seconds']})
+        summary[str(length)] = {
+            'wall_seconds': round(statistics.median(r['wall_seconds'] for r in group), 3),
+            'realtime_factor': round(statistics.median(r['realtime_factor'] or 0 for r in group), 3),
+            'stage_seconds': {
+                s: round(statistics.median(r['stage_seconds'].get(s, 0.0) for r in group), 3)
+                for s in stages
+            },
+        }
+    return summary
+
+
+def compare(report, baseline, tolerance):
+    """Return (rows, regressions) comparing median timings with a baseline report."""
+    rows, regressions = [], []
+    for length, current in report['summary'].items():
+        base = baseline.get('summary', {}).get(length)
+        if not base:
+            continue
+        pairs = [('end_to_end', base['wall_seconds'], current['wall_seconds'])]
+        pairs += [(stage, base['stage_seconds'][stage], seconds)
+                  for stage, seconds in current['stage_seconds'].items() if stage in base['stage_seconds']]
+        for stage, before, after in pairs:
+            change = (after - before) / before if before else 0.0
+            regressed = after > before * (1 + tolerance) and after - before > MIN_REGRESSION_SECONDS
+            row = {'length': int(length), 'stage': stage, 'baseline': before, 'current': after,
+                   'change': round(change, 3), 'regressed': regressed}
+            rows.append(row)
+            if regressed:
+                regressions.append(row)
+    return rows, regressions
+
+
+def environment(args):
+    try:
+        ffmpeg_version = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True).stdout.split('\n')[0]
+    except OSError:
+        ffmpeg_version = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'ffmpeg': ffmpeg_version,
+        'whisper_model': None if args.fake_whisper else args.whisper_model,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the video translation pipeline")
+    parser.add_argument('--lengths', default='10,60,300', help='comma-separated video lengths in seconds')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per length (the median is reported)')
+    parser.add_argument('--size', default='640x360', help='test video resolution')
+    parser.add_argument('--langs', default='hi', help='comma-separated target languages')
+    parser.add_argument('--whisper-model', default='tiny')
+    parser.add_argument('--fake-whisper', action='store_true', help='skip Whisper and use synthetic segments')
+    parser.add_argument('--burn-subs', action='store_true')
+    parser.add_argument('--soft-subs', action='store_true')
+    parser.add_argument('--warm', action='store_true', help='keep caches between runs instead of starting cold')
+    parser.add_argument('--translator', default='fake', help='translator backend (fake, or a local one such as marian)')
+    parser.add_argument('--tts', default='fake', help='TTS backend (fake, or a local one such as espeak or piper)')
+    parser.add_argument('--translate-latency', type=float, default=0.0, help='seconds added per fake translate call')
+    parser.add_argument('--tts-latency', type=float, default=0.0, help='seconds added per fake TTS clip')
+    parser.add_argument('--media-dir', default=DEFAULT_MEDIA_DIR, help='where generated test videos are kept')
+    parser.add_argument('--output', default='benchmark_report.json', help='where to write the JSON report')
+    parser.add_argument('--baseline', help='compare against this report')
+    parser.add_argument('--save-baseline', help='also write the report here as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before a stage counts as regressed')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch directory')
+    args = parser.parse_args()
+    args.lengths = [int(x) for x in args.lengths.split(',') if x.strip()]
+    args.langs = [x.strip() for x in args.langs.split(',') if x.strip()]
+    # The run happens in a scratch directory, so pin user-supplied paths first
+    for name in ('media_dir', 'output', 'baseline', 'save_baseline'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    media = {length: media_for(length, args.media_dir, args.size) for length in args.lengths}
+
+    # app.py keeps uploads/, static/ and cache/ relative to the working directory
+    work_dir = tempfile.mkdtemp(prefix="myvideo-bench-")
+    sys.path.insert(0, HERE)
+    os.chdir(work_dir)
+    try:
+        app, reset_caches = install_fakes(work_dir, args)
+        model_load_seconds = None
+        if not args.fake_whisper:
+            start = time.perf_counter()
+            app.model_registry.get(args.whisper_model)
+            model_load_seconds = round(time.perf_counter() - start, 3)
+
+        reset_caches(os.path.join(work_dir, "caches", "shared"))
+        runs = []
+        for length in args.lengths:
+            for i in range(args.repeat):
+                if not args.warm:
+                    reset_caches(os.path.join(work_dir, "caches", f"{length}-{i}"))
+                run = dict(length=length, repeat=i, **run_once(app, media[length], args, f"bench{length}r{i}"))
+                runs.append(run)
+                print(f"{length:>5}s run {i + 1}/{args.repeat}: {run['wall_seconds']:.2f}s wall, "
+                      f"{run['realtime_factor']}x realtime", file=sys.stderr)
+    finally:
+        os.chdir(HERE)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'version': REPORT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': environment(args),
+        'config': {k: v for k, v in vars(args).items()
+                   if k not in ('output', 'baseline', 'save_baseline', 'keep', 'media_dir')},
+        'model_load_seconds': model_load_seconds,
+        'runs': runs,
+        'summary': summarize(runs),
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.tolerance)
+        report['comparison'] = {'baseline': args.baseline, 'tolerance': args.tolerance, 'rows': rows}
+        for row in rows:
+            mark = "REGRESSED" if row['regressed'] else ""
+            print(f"{row['length']:>5}s {row['stage']:<15} {row['baseline']:>9.3f}s -> {row['current']:>9.3f}s "
+                  f"({row['change']:+.0%}) {mark}", file=sys.stderr)
+
+    # The pipeline prints progress to stdout, so the report always goes to a file
+    text = json.dumps(report, indent=2)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+    print(f"Report written to {args.output}", file=sys.stderr)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    if regressions:
+        print(f"{len(regressions)} timings regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
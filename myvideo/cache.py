@@ -0,0 +1,269 @@
+"""
+On-disk caches for expensive pipeline stages.
+
+Entries are plain files in a cache directory. A file's modification time
+doubles as its last-used time, so a hit "touches" the entry and eviction
+removes the least recently used files until the directory fits its byte
+budget again. The directory is listed once when the cache is created; after
+that an in-memory index and running total keep track of it.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+
+CACHE_FOLDER = os.getenv("CACHE_FOLDER", "cache")
+# Byte budget for cached transcripts (they are small; 200 MB holds thousands)
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+# Byte budget for synthesized speech clips
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Disk quota for downloaded YouTube videos
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))
+
+
+class EntryTooLargeError(Exception):
+    """Raised when a single file is larger than the cache's whole byte budget."""
+
+
+def hash_file(path, extra=""):
+    """sha256 of a file's contents (read in 1 MB blocks) plus an optional suffix."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    h.update(extra.encode('utf-8'))
+    return h.hexdigest()
+
+
+def hash_array(array, extra=""):
+    """sha256 of an in-memory audio buffer plus an optional suffix."""
+    h = hashlib.sha256()
+    h.update(memoryview(array).cast('B'))
+    h.update(extra.encode('utf-8'))
+    return h.hexdigest()
+
+
+class DiskLRUCache:
+    """A directory of files evicted least-recently-used first once over max_bytes."""
+
+    def __init__(self, folder, max_bytes, suffix=""):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Files sharing a stem ("abc.mp4" and "abc.json") form one entry and
+        # are evicted together: stem -> {file name: size}, least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # Stems in use elsewhere (see pin()); eviction skips them
+        self._pinned = Counter()
+        os.makedirs(folder, exist_ok=True)
+        self._load()
+
+    def path_for(self, key):
+        return os.path.join(self.folder, f"{key}{self.suffix}")
+
+    def lookup(self, key, count=True):
+        """
+        Return the path of a cached entry (marking it recently used) or None.
+        count=False leaves the hit/miss counters alone, for a second look at
+        a key whose first lookup was already counted.
+        """
+        path = self.path_for(key)
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path, None)
+                self._index(os.path.basename(path))
+                self.hits += count
+                return path
+            self.misses += count
+            return None
+
+    def store(self, key, src_path):
+        """
+        Move src_path into the cache under key and evict old entries if over
+        budget. The entry being stored is never evicted; a file larger than
+        the whole budget raises EntryTooLargeError and is left where it is.
+        """
+        path = self.path_for(key)
+        name = os.path.basename(path)
+        with self._lock:
+            size = os.path.getsize(src_path)
+            if size > self.max_bytes:
+                raise EntryTooLargeError(
+                    f"{name} is {size} bytes, more than the cache's {self.max_bytes} byte budget")
+            os.replace(src_path, path)
+            self._index(name, size)
+            if self._bytes > self.max_bytes:
+                self._evict(keep=name.split('.')[0])
+        return path
+
+    def pin(self, stem):
+        """Keep the entry for stem from being evicted until a matching unpin()."""
+        with self._lock:
+            self._pinned[stem] += 1
+
+    def unpin(self, stem):
+        with self._lock:
+            self._pinned[stem] -= 1
+            if self._pinned[stem] <= 0:
+                del self._pinned[stem]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'entries': sum(len(files) for files in self._entries.values()),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _load(self):
+        # Oldest first, so an entry ends up ordered by its newest file
+        found = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if not os.path.isfile(path) or name.endswith('.tmp'):
+                continue
+            st = os.stat(path)
+            found.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(found):
+            self._index(name, size)
+
+    def _index(self, name, size=None):
+        # Mark name's entry most recently used; with a size, (re)record the file
+        stem = name.split('.')[0]
+        files = self._entries.setdefault(stem, {})
+        if size is not None:
+            self._bytes += size - files.get(name, 0)
+            files[name] = size
+        elif name not in files:
+            # Written behind our back (e.g. by another worker process)
+            files[name] = os.path.getsize(os.path.join(self.folder, name))
+            self._bytes += files[name]
+        self._entries.move_to_end(stem)
+
+    def _evict(self, keep=None):
+        # Least recently used first, skipping the entry just stored and pinned ones
+        for stem in list(self._entries):
+            if self._bytes <= self.max_bytes:
+                break
+            if stem == keep or stem in self._pinned:
+                continue
+            files = self._entries.pop(stem)
+            for name, size in files.items():
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+                self._bytes -= size
+
+
+class TranscriptionCache(DiskLRUCache):
+    """
+    Whisper results keyed by the 16 kHz audio and the model name. The audio
+    is either the extracted WAV file or the float32 array decoded by
+    load_audio_pipe(). Jobs also key them by their source (key_for_source()).
+
+    Only text, language and segments are kept, which is all the routes use.
+    """
+
+    def __init__(self, folder=os.path.join(CACHE_FOLDER, "transcripts"),
+                 max_bytes=TRANSCRIPTION_CACHE_MAX_BYTES):
+        super().__init__(folder, max_bytes, suffix=".json")
+
+    @staticmethod
+    def key_for(audio, model_name):
+        if isinstance(audio, str):
+            return hash_file(audio, extra=f"|whisper:{model_name}")
+        return hash_array(audio, extra=f"|whisper:{model_name}")
+
+    @staticmethod
+    def key_for_source(source_id, model_name):
+        """
+        Key by a stable source identity (an upload's sha256 or "youtube:<video id>"),
+        so a repeat skips audio extraction too and doesn't depend on which stream was decoded.
+        """
+        return hashlib.sha256(f"source:{source_id}|whisper:{model_name}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        path = self.lookup(key)
+        if not path:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A truncated or unreadable entry is just a miss
+            return None
+
+    def put(self, key, result):
+        entry = {
+            'text': result.get('text', ''),
+            'language': result.get('language', 'unknown'),
+            'segments': result.get('segments', []),
+        }
+        tmp_path = self.path_for(key) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # whisper segments can carry numpy floats; store them as plain floats
+            json.dump(entry, f, ensure_ascii=False, default=float)
+        self.store(key, tmp_path)
+        return entry
+
+
+class TTSCache(DiskLRUCache):
+    """Synthesized MP3s keyed by (text, language, engine)."""
+
+    def __init__(self, folder=os.path.join(CACHE_FOLDER, "tts"), max_bytes=TTS_CACHE_MAX_BYTES):
+        super().__init__(folder, max_bytes, suffix=".mp3")
+
+    @staticmethod
+    def key_for(text, lang, engine):
+        return hashlib.sha256(f"{engine}|{lang}|{text}".encode('utf-8')).hexdigest()
+
+
+class DownloadCache(DiskLRUCache):
+    """
+    Downloaded YouTube videos keyed by video ID.
+
+    Each entry is the media file "<id>.<ext>" plus "<id>.json" holding the
+    title and file name, so a repeat request needs no download at all. The
+    app pins a video ID while its download lock is held, so eviction never
+    removes a video that is being fetched or waited for.
+    """
+
+    def __init__(self, folder=os.path.join(CACHE_FOLDER, "downloads"), max_bytes=DOWNLOAD_CACHE_MAX_BYTES):
+        super().__init__(folder, max_bytes)
+
+    def get(self, video_id, count=True):
+        """Return (media_path, metadata) for a cached video, or None."""
+        meta_path = self.lookup(f"{video_id}.json", count)
+        if not meta_path:
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        media_path = os.path.join(self.folder, meta.get('filename', ''))
+        if not os.path.isfile(media_path):
+            return None
+        os.utime(media_path, None)
+        return media_path, meta
+
+    def put(self, video_id, src_path, meta):
+        """Atomically move a finished download into the cache."""
+        ext = os.path.splitext(src_path)[1]
+        media_path = self.store(f"{video_id}{ext}", src_path)
+        meta = dict(meta, id=video_id, filename=os.path.basename(media_path))
+        tmp_path = self.path_for(f"{video_id}.json") + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self.store(f"{video_id}.json", tmp_path)
+        return media_path
@@ -0,0 +1,144 @@
+"""
+Checkpointed job directories.
+
+Each job gets jobs/<job_id>/ with a manifest.json recording its kind, its
+parameters, its last known status and every completed stage with that
+stage's outputs. Stage
+outputs (audio, transcript JSON, translated segments, ...) are written
+into the same directory, so a retry of the job, even after a restart,
+skips every stage that already finished and resumes at the one that failed.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+JOBS_FOLDER = os.getenv("JOBS_FOLDER", "jobs")
+# Job directories left behind by failed jobs are removed after this long
+JOB_CHECKPOINT_TTL_SECONDS = int(os.getenv("JOB_CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _write_json(path, data):
+    # Write to a temp file and rename, so a crash never leaves half a file behind
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=float)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_manifest(job_id, folder=JOBS_FOLDER):
+    """The stored manifest of a job, or None if it has no directory."""
+    path = os.path.join(folder, os.path.basename(job_id), MANIFEST_NAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class JobCheckpoint:
+    def __init__(self, job_id, kind=None, params=None, folder=JOBS_FOLDER):
+        self.dir = os.path.join(folder, os.path.basename(job_id))
+        os.makedirs(self.dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest = load_manifest(job_id, folder) or {
+            'job_id': job_id,
+            'kind': kind,
+            'params': params,
+            'created_at': time.time(),
+            'stages': {},
+        }
+        self._manifest['status'] = 'queued'
+        self._manifest['updated_at'] = time.time()
+        self._save()
+
+    def set_status(self, status):
+        """Record the job's status, so it is known after a restart too."""
+        with self._lock:
+            self._manifest['status'] = status
+            self._manifest['updated_at'] = time.time()
+            self._save()
+
+    def path(self, name):
+        """Path of a stage artifact inside the job directory."""
+        return os.path.join(self.dir, name.replace(':', '_').replace('/', '_'))
+
+    def done(self, stage):
+        with self._lock:
+            return stage in self._manifest['stages']
+
+    def outputs(self, stage):
+        with self._lock:
+            return dict(self._manifest['stages'].get(stage, {}).get('outputs', {}))
+
+    def complete(self, stage, **outputs):
+        """Record stage as finished along with its outputs."""
+        with self._lock:
+            self._manifest['stages'][stage] = {'finished_at': time.time(), 'outputs': outputs}
+            self._manifest['updated_at'] = time.time()
+            self._save()
+
+    def json_stage(self, stage, compute):
+        """
+        Return compute()'s JSON-serializable result, running it only if stage
+        has not completed before; the result is kept in <stage>.json.
+        """
+        path = self.path(f"{stage}.json")
+        if self.done(stage) and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                print(f"Resuming: {stage} already done")
+                return json.load(f)
+        data = compute()
+        _write_json(path, data)
+        self.complete(stage, file=os.path.basename(path))
+        return data
+
+    def file_stage(self, stage, paths, compute):
+        """
+        Run compute() unless stage completed before and every file in paths
+        still exists; compute() is expected to write those files.
+        """
+        paths = [p for p in paths if p]
+        if self.done(stage) and all(os.path.exists(p) for p in paths):
+            print(f"Resuming: {stage} already done")
+            return
+        compute()
+        self.complete(stage, paths=paths)
+
+    def finish(self):
+        """Drop the intermediate artifacts of a job that succeeded; keep the manifest."""
+        for name in os.listdir(self.dir):
+            if name == MANIFEST_NAME:
+                continue
+            path = os.path.join(self.dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+    def _save(self):
+        _write_json(os.path.join(self.dir, MANIFEST_NAME), self._manifest)
+
+
+def sweep_checkpoints(folder=JOBS_FOLDER, max_age=JOB_CHECKPOINT_TTL_SECONDS):
+    """Remove job directories not updated for max_age seconds."""
+    if not os.path.isdir(folder):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        manifest = load_manifest(name, folder)
+        updated = manifest.get('updated_at', 0) if manifest else os.path.getmtime(path)
+        if os.path.isdir(path) and updated < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,129 @@
+"""
+HLS packaging for translated videos.
+
+One ffmpeg run scales the translated MP4 into a small bitrate ladder and
+cuts every rung into aligned segments under a master playlist, so players
+start on the first few seconds and switch rungs as the link allows. The
+translated subtitles are added as a WebVTT rendition.
+"""
+import math
+import os
+import re
+import subprocess
+
+import ffmpeg
+
+# (name, height, video kbps, audio kbps), highest first; rungs above the
+# source height are dropped
+HLS_LADDER = [
+    ("720p", 720, 2800, 128),
+    ("480p", 480, 1200, 96),
+    ("240p", 240, 400, 64),
+]
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+# ffmpeg's MPEG-TS muxer starts timestamps at 1.4 s unless told otherwise
+DEFAULT_MPEGTS_START = 126000
+
+
+def ladder_for(height, ladder=HLS_LADDER):
+    """Rungs no taller than the source; always at least the smallest one."""
+    rungs = [r for r in ladder if not height or r[1] <= height]
+    return rungs or [ladder[-1]]
+
+
+def srt_to_vtt(srt_path, vtt_path, mpegts_start=DEFAULT_MPEGTS_START):
+    """Convert an SRT file to WebVTT aligned with the MPEG-TS segments."""
+    with open(srt_path, 'r', encoding='utf-8') as f:
+        srt = f.read()
+    cues = re.sub(r'(\d{2}:\d{2}:\d{2}),(\d{3})', r'\1.\2', srt.replace('\r\n', '\n'))
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write(f"WEBVTT\nX-TIMESTAMP-MAP=MPEGTS:{mpegts_start},LOCAL:00:00:00.000\n\n")
+        f.write(cues.strip() + "\n")
+    return vtt_path
+
+
+def build_ladder_command(video_path, output_dir, rungs, segment_seconds=HLS_SEGMENT_SECONDS):
+    """ffmpeg arguments that encode every rung and write v<i>/index.m3u8 plus master.m3u8."""
+    splits = ''.join(f"[s{i}]" for i in range(len(rungs)))
+    graph = [f"[0:v]split={len(rungs)}{splits}"]
+    graph += [f"[s{i}]scale=-2:{height}[v{i}]" for i, (_, height, _, _) in enumerate(rungs)]
+
+    command = ['ffmpeg', '-y', '-i', video_path, '-filter_complex', ';'.join(graph)]
+    for i, (_, _, video_kbps, audio_kbps) in enumerate(rungs):
+        command += [
+            '-map', f'[v{i}]', '-map', '0:a:0',
+            f'-c:v:{i}', 'libx264', f'-b:v:{i}', f'{video_kbps}k',
+            f'-maxrate:v:{i}', f'{int(video_kbps * 1.07)}k', f'-bufsize:v:{i}', f'{int(video_kbps * 1.5)}k',
+            f'-c:a:{i}', 'aac', f'-b:a:{i}', f'{audio_kbps}k',
+        ]
+    command += [
+        '-preset', 'veryfast',
+        # Keyframes on segment boundaries so every rung switches cleanly
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})', '-sc_threshold', '0',
+        '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments',
+        '-hls_segment_filename', os.path.join(output_dir, 'v%v', 'seg_%04d.ts'),
+        '-master_pl_name', 'master.m3u8',
+        '-var_stream_map', ' '.join(f"v:{i},a:{i},name:{i}" for i in range(len(rungs))),
+        os.path.join(output_dir, 'v%v', 'index.m3u8'),
+    ]
+    return command
+
+
+def first_segment_start(output_dir):
+    """The first segment's start in 90 kHz ticks, for the WebVTT timestamp map."""
+    try:
+        start = ffmpeg.probe(os.path.join(output_dir, 'v0', 'seg_0000.ts'))['format']['start_time']
+        return int(round(float(start) * 90000))
+    except (ffmpeg.Error, KeyError, ValueError):
+        return DEFAULT_MPEGTS_START
+
+
+def add_subtitle_rendition(output_dir, srt_path, lang, duration):
+    """Write subs.vtt with its playlist and reference it from master.m3u8."""
+    srt_to_vtt(srt_path, os.path.join(output_dir, 'subs.vtt'), first_segment_start(output_dir))
+    # A single cue file covering the whole programme is a valid VOD rendition
+    with open(os.path.join(output_dir, 'subs.m3u8'), 'w', encoding='utf-8') as f:
+        f.write(
+            "#EXTM3U\n#EXT-X-VERSION:3\n"
+            f"#EXT-X-TARGETDURATION:{max(1, math.ceil(duration))}\n"
+            "#EXT-X-PLAYLIST-TYPE:VOD\n"
+            f"#EXTINF:{duration:.3f},\nsubs.vtt\n#EXT-X-ENDLIST\n"
+        )
+
+    master_path = os.path.join(output_dir, 'master.m3u8')
+    with open(master_path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    media = (f'#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="{lang}",LANGUAGE="{lang}",'
+             'DEFAULT=YES,AUTOSELECT=YES,URI="subs.m3u8"')
+    out = []
+    for line in lines:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            if media:
+                out.append(media)
+                media = None
+            line += ',SUBTITLES="subs"'
+        out.append(line)
+    with open(master_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out) + '\n')
+
+
+def package_hls(video_path, output_dir, srt_path=None, lang=None):
+    """
+    Package video_path as HLS in output_dir and return the master playlist path.
+
+    The ladder is capped at the source height; srt_path, if given, becomes a
+    WebVTT subtitle rendition labelled lang.
+    """
+    probe = ffmpeg.probe(video_path)
+    video_stream = next((s for s in probe['streams'] if s.get('codec_type') == 'video'), {})
+    duration = float(probe['format'].get('duration', 0))
+    rungs = ladder_for(int(video_stream.get('height', 0)))
+
+    for i in range(len(rungs)):
+        os.makedirs(os.path.join(output_dir, f'v{i}'), exist_ok=True)
+    subprocess.run(build_ladder_command(video_path, output_dir, rungs), check=True)
+
+    if srt_path and os.path.exists(srt_path):
+        add_subtitle_rendition(output_dir, srt_path, lang or 'und', duration)
+    return os.path.join(output_dir, 'master.m3u8')
@@ -0,0 +1,202 @@
+"""
+Background job queue for the video translation pipeline.
+
+Routes enqueue work here and return a job ID straight away; a bounded
+pool of worker threads runs the pipeline while clients poll the job
+status for stage, progress and result URLs, or follow its event log
+(stage changes, transcript segments, translations) as it grows. Every job checkpoints its
+stages under jobs/<job_id>/, so a failed stage is retried without redoing
+the ones before it.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from checkpoints import JobCheckpoint
+from metrics import count
+
+# Number of pipelines allowed to run at the same time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs waiting for a worker before new submissions are rejected
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "20"))
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(24 * 3600)))
+# Attempts per job; later attempts resume from the last completed stage
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv("JOB_RETRY_DELAY_SECONDS", "5"))
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_QUEUE_LIMIT pending jobs."""
+
+
+class Job:
+    def __init__(self, kind, params, job_id=None):
+        self.id = job_id or str(uuid.uuid4())[:8]
+        self.kind = kind
+        self.params = params
+        self.status = "queued"  # queued -> running -> done / failed
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.attempts = 0
+        # Seconds per stage and input-size totals, filled in by metrics.timed_stage/count
+        self.stage_seconds = {}
+        self.counters = {}
+        # Set by stages.StageGraph: the chain of stages that bounded the run time
+        self.critical_path = None
+        self._lock = threading.Lock()
+        # Append-only event log; ids are list positions so a client can resume from one
+        self.events = []
+        self._events_changed = threading.Condition()
+        self.checkpoint = JobCheckpoint(self.id, kind, params)
+
+    def update(self, stage=None, progress=None):
+        """Record the current pipeline stage and overall progress (0-1)."""
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, float(progress)))
+            state = {'stage': self.stage, 'progress': round(self.progress, 3)}
+        print(f"[job {self.id}] {self.stage} ({self.progress:.0%})")
+        self.emit('stage', state)
+
+    def emit(self, event, data):
+        """Append an event (a type and a JSON-serializable payload) to the job's log."""
+        with self._events_changed:
+            self.events.append({'id': len(self.events), 'event': event, 'data': data})
+            self._events_changed.notify_all()
+
+    def events_since(self, last_id, timeout=None):
+        """
+        Events after last_id (-1 for all), waiting up to timeout seconds
+        for one to arrive; an empty list means none came in time.
+        """
+        with self._events_changed:
+            self._events_changed.wait_for(lambda: len(self.events) > last_id + 1, timeout)
+            return self.events[last_id + 1:]
+
+    def record_stage(self, stage, seconds):
+        # Stages that run once per target language are summed
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def record_count(self, name, amount):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_critical_path(self, seconds, stages, wall_seconds):
+        with self._lock:
+            self.critical_path = {
+                'seconds': round(seconds, 3),
+                'stages': list(stages),
+                'wall_seconds': round(wall_seconds, 3),
+            }
+
+    def metrics(self):
+        with self._lock:
+            data = {
+                'stage_seconds': {k: round(v, 3) for k, v in self.stage_seconds.items()},
+                'counters': dict(self.counters),
+            }
+            if self.critical_path is not None:
+                data['critical_path'] = dict(self.critical_path)
+            return data
+
+    def to_dict(self):
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'stage': self.stage,
+                'progress': round(self.progress, 3),
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'attempts': self.attempts,
+            }
+            if self.result is not None:
+                data['result'] = self.result
+            if self.error is not None:
+                data['error'] = self.error
+        data['metrics'] = self.metrics()
+        return data
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.queue_limit = queue_limit
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, params, job_id=None, on_done=None):
+        """
+        Queue func(job, **params) to run on the worker pool.
+
+        Passing the job_id of an earlier job resumes it from its checkpoints.
+        on_done(job) is called once the job has finished, either way.
+        Returns the Job; raises QueueFullError if too many jobs are waiting.
+        """
+        with self._lock:
+            self._expire_finished()
+            pending = sum(1 for j in self.jobs.values() if j.status == "queued")
+            if pending >= self.queue_limit:
+                raise QueueFullError(f"Job queue is full ({pending} jobs waiting)")
+            job = Job(kind, params, job_id)
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, func, on_done)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, func, on_done=None):
+        job.status = "running"
+        job.started_at = time.time()
+        job.checkpoint.set_status(job.status)
+        try:
+            while True:
+                job.attempts += 1
+                try:
+                    job.result = func(job, **job.params)
+                    break
+                except Exception as e:
+                    print(f"Error in job {job.id} ({job.kind}), attempt {job.attempts}:", e)
+                    if job.attempts >= JOB_MAX_ATTEMPTS:
+                        raise
+                    job.update(stage=f"retrying after error in {job.stage}")
+                    time.sleep(JOB_RETRY_DELAY_SECONDS)
+            if isinstance(job.result, dict):
+                job.result['metrics'] = job.metrics()
+            job.checkpoint.finish()
+            job.status = "done"
+            job.update(stage="done", progress=1.0)
+            job.emit('done', {'status': job.status})
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.update(stage="failed")
+            job.emit('failed', {'status': job.status, 'error': job.error})
+        finally:
+            job.finished_at = time.time()
+            job.checkpoint.set_status(job.status)
+            count('jobs', 1, kind=job.kind, status=job.status)
+            if on_done:
+                on_done(job)
+
+    def _expire_finished(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [job_id for job_id, j in self.jobs.items()
+                   if j.finished_at is not None and j.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
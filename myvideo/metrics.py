@@ -0,0 +1,109 @@
+"""
+Per-stage pipeline metrics.
+
+Every pipeline stage (download, audio extraction, Whisper, translation,
+TTS, muxing, ...) runs inside timed_stage(), which feeds a duration
+histogram and an error counter; count() adds input sizes such as audio
+seconds, characters translated and bytes written. Totals are rendered in
+the Prometheus text format for /metrics, and when a job is passed the same
+numbers are kept on the job so they can be returned with its result.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+COUNTER_HELP = {
+    'stage_errors': "Pipeline stages that raised an exception",
+    'audio_seconds': "Seconds of source audio processed",
+    'translated_characters': "Characters of source text sent for translation",
+    'synthesized_characters': "Characters of text sent for speech synthesis",
+    'bytes_written': "Bytes of output written by pipeline stages",
+    'jobs': "Pipeline jobs finished, by kind and status",
+}
+
+
+def _escape(value):
+    # Label values escape backslash, double quote and newline in the text format
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + '}'
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._durations = {}  # stage -> [per-bucket counts, sum, count]
+        self._counters = {}  # (name, sorted label items) -> value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._durations.setdefault(stage, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[0][i] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP pipeline_stage_duration_seconds Wall-clock time spent in each pipeline stage",
+            "# TYPE pipeline_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage, (counts, total, count) in sorted(self._durations.items()):
+                for bound, n in zip(self.buckets, counts):
+                    lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {n}')
+                lines.append(f'pipeline_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'pipeline_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'pipeline_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+            counters = sorted(self._counters.items())
+        for name, help_text in COUNTER_HELP.items():
+            lines.append(f"# HELP pipeline_{name}_total {help_text}")
+            lines.append(f"# TYPE pipeline_{name}_total counter")
+            for (counter, labels), value in counters:
+                if counter == name:
+                    lines.append(f"pipeline_{name}_total{_labels(dict(labels))} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by every route and worker thread
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def timed_stage(stage, job=None):
+    """Time the enclosed block as one run of stage; exceptions count as stage errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        count('stage_errors', 1, job, stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(stage, elapsed)
+        if job is not None:
+            job.record_stage(stage, elapsed)
+
+
+def count(name, amount, job=None, **labels):
+    """Add amount to a counter, and to the job's own totals when job is given."""
+    if not amount:
+        return
+    metrics.inc(name, amount, **labels)
+    if job is not None:
+        job.record_count(name, amount)
@@ -0,0 +1,99 @@
+"""
+Lazily loaded Whisper models with a memory budget.
+
+Models are loaded the first time a job asks for them and kept in LRU
+order; loading a model that would exceed WHISPER_MEMORY_BUDGET_MB evicts
+the least recently used ones first.
+
+A loaded model is shared by every job thread, but it can only run one
+decode at a time: Whisper installs its KV-cache hooks on the model's own
+modules, so two concurrent transcribe() or detect_language() calls corrupt
+each other's caches. Callers run them inside use(), which holds the
+model's lock; jobs that want the same model take turns, and jobs on
+different models still run side by side.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import whisper
+
+# Total memory allowed for loaded Whisper models
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "2048"))
+
+# Rough fp32 weight sizes, used to make room before a model is loaded
+ESTIMATED_MODEL_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3070,
+    "large": 6200,
+}
+
+
+def model_size_mb(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024)
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb=WHISPER_MEMORY_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()  # name -> (model, size_mb), oldest first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._use_locks = {}  # name -> lock held while the model decodes
+
+    def available(self):
+        return whisper.available_models()
+
+    def get(self, name):
+        """Return the named model, loading it (and evicting others) if needed."""
+        if name not in self.available():
+            raise ValueError(f"Unknown Whisper model '{name}'. Choose from: {', '.join(self.available())}")
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name][0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Loading takes seconds; only block other requests for the same model
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    return self._models[name][0]
+                self._make_room(ESTIMATED_MODEL_MB.get(name.split('.')[0].split('-')[0], 0))
+            print("Loading Whisper model:", name)
+            model = whisper.load_model(name)
+            size = model_size_mb(model)
+            with self._lock:
+                self._models[name] = (model, size)
+                self._make_room(0)
+            return model
+
+    @contextmanager
+    def use(self, name):
+        """
+        The named model (as get()) for exclusive use: hold this around every
+        transcribe() / detect_language() call on it.
+        """
+        model = self.get(name)
+        with self._lock:
+            use_lock = self._use_locks.setdefault(name, threading.Lock())
+        with use_lock:
+            yield model
+
+    def loaded(self):
+        with self._lock:
+            return {name: round(size, 1) for name, (_, size) in self._models.items()}
+
+    def _make_room(self, needed_mb):
+        # Before a load everything may go; afterwards keep at least the newest
+        # model even if it alone is over budget
+        keep = 0 if needed_mb else 1
+        used = sum(size for _, size in self._models.values())
+        while len(self._models) > keep and used + needed_mb > self.budget_mb:
+            evicted, (_, size) = self._models.popitem(last=False)
+            used -= size
+            print("Evicting Whisper model:", evicted)
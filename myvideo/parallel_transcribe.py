@@ -0,0 +1,195 @@
+"""
+Parallel chunked transcription for long videos.
+
+The 16 kHz audio is cut into chunks of roughly PARALLEL_CHUNK_SECONDS at
+the quietest point near each boundary, every chunk is transcribed in a
+process pool where each worker holds its own Whisper model, and the
+segments are stitched back together with global timestamps.
+
+When a job streams its segments, shorter audio is cut the same way into
+windows of STREAM_WINDOW_SECONDS that are transcribed one after another in
+this process, so segments arrive every window instead of all at the end.
+"""
+import multiprocessing
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import whisper
+
+SAMPLE_RATE = 16000
+# Worker processes (each loads its own model); 1 disables parallel mode
+PARALLEL_TRANSCRIBE_WORKERS = int(os.getenv("PARALLEL_TRANSCRIBE_WORKERS", str(max(1, (os.cpu_count() or 1) // 2))))
+# Audio shorter than this is transcribed in one piece
+PARALLEL_MIN_SECONDS = float(os.getenv("PARALLEL_MIN_SECONDS", "600"))
+# Target chunk length; the actual cut lands on the quietest frame nearby
+PARALLEL_CHUNK_SECONDS = float(os.getenv("PARALLEL_CHUNK_SECONDS", "300"))
+# Pools (one per Whisper model) kept alive at once; every worker holds a model
+PARALLEL_TRANSCRIBE_MAX_POOLS = int(os.getenv("PARALLEL_TRANSCRIBE_MAX_POOLS", "2"))
+# Window length when streaming segments from audio too short for the pool; 0 disables
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "60"))
+# How far either side of the target boundary to look for silence
+SILENCE_SEARCH_SECONDS = 15.0
+FRAME_SECONDS = 0.03
+
+_worker_model = None
+_pools = OrderedDict()  # model name -> process pool, least recently used first
+_pool_lock = threading.Lock()
+
+
+def find_split_points(audio, chunk_seconds=PARALLEL_CHUNK_SECONDS, search_seconds=SILENCE_SEARCH_SECONDS):
+    """
+    Return sample offsets at which to cut audio into chunks.
+
+    Each cut is placed on the lowest-energy frame within search_seconds of
+    the ideal chunk boundary, so cuts fall between words where possible.
+    """
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+    energy = np.sqrt(np.mean(audio[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+
+    splits = []
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    target = chunk
+    while target < len(audio) - search:
+        lo = max(0, (target - search) // frame)
+        hi = min(n_frames, (target + search) // frame)
+        if hi <= lo:
+            break
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cut = quietest * frame + frame // 2
+        splits.append(cut)
+        target = cut + chunk
+    return splits
+
+
+def _init_worker(model_name):
+    global _worker_model
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(chunk, offset_seconds, language=None):
+    return _shift_segments(_worker_model.transcribe(chunk, language=language), offset_seconds)
+
+
+def _shift_segments(result, offset_seconds):
+    # A chunk's (language, segments) with timings moved onto the full timeline
+    segments = []
+    for seg in result.get('segments', []):
+        seg = dict(seg)
+        seg['start'] = float(seg['start']) + offset_seconds
+        seg['end'] = float(seg['end']) + offset_seconds
+        if 'words' in seg:
+            seg['words'] = [
+                dict(w, start=float(w['start']) + offset_seconds, end=float(w['end']) + offset_seconds)
+                for w in seg['words']
+            ]
+        segments.append(seg)
+    return result.get('language', 'unknown'), segments
+
+
+def _get_pool(model_name):
+    """
+    The process pool for model_name. Pools live across jobs so workers keep
+    their models loaded; beyond PARALLEL_TRANSCRIBE_MAX_POOLS models the least
+    recently used pool is shut down (chunks already submitted to it still finish).
+    """
+    with _pool_lock:
+        pool = _pools.get(model_name)
+        if pool is None:
+            while _pools and len(_pools) >= max(1, PARALLEL_TRANSCRIBE_MAX_POOLS):
+                _, evicted = _pools.popitem(last=False)
+                evicted.shutdown(wait=False)
+            # spawn: forking a process that already holds torch state is unsafe
+            pool = _pools[model_name] = ProcessPoolExecutor(
+                max_workers=PARALLEL_TRANSCRIBE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_name,)
+            )
+        _pools.move_to_end(model_name)
+        return pool
+
+
+def should_parallelize(audio):
+    return PARALLEL_TRANSCRIBE_WORKERS > 1 and len(audio) / SAMPLE_RATE >= PARALLEL_MIN_SECONDS
+
+
+def _split(audio, chunk_seconds):
+    bounds = [0] + find_split_points(audio, chunk_seconds) + [len(audio)]
+    return [(audio[a:b], a / SAMPLE_RATE) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _stitch(results, total, on_segments=None):
+    # Number the (language, segments) of each of the total chunks in timeline
+    # order and merge them. results is consumed lazily, so on_segments sees a
+    # chunk as soon as it is produced rather than after the last one.
+    languages = Counter()
+    segments = []
+    for n, (language, chunk_segments) in enumerate(results, start=1):
+        languages[language] += len(chunk_segments) or 1
+        for seg in chunk_segments:
+            seg['id'] = len(segments)
+            segments.append(seg)
+        if on_segments:
+            on_segments(chunk_segments, n == total, language)
+    return {
+        'text': ''.join(seg['text'] for seg in segments),
+        'language': languages.most_common(1)[0][0] if languages else 'unknown',
+        'segments': segments,
+    }
+
+
+def transcribe_parallel(audio, model_name, on_segments=None, language=None):
+    """
+    Transcribe a float32 16 kHz array across the process pool.
+
+    Returns a dict shaped like whisper's transcribe() result: text,
+    language (majority vote over chunks) and segments with global timings.
+    on_segments(segments, final, language) is called with each chunk's segments, in
+    timeline order, as soon as that chunk and the ones before it are done.
+    A language detected up front is pinned for every chunk. A streaming job
+    gets chunks of at most STREAM_WINDOW_SECONDS, so its first segments
+    don't wait for a whole PARALLEL_CHUNK_SECONDS chunk.
+    """
+    chunk_seconds = PARALLEL_CHUNK_SECONDS
+    if on_segments and STREAM_WINDOW_SECONDS > 0:
+        chunk_seconds = min(chunk_seconds, STREAM_WINDOW_SECONDS)
+    chunks = _split(audio, chunk_seconds)
+    print(f"Transcribing {len(chunks)} chunks on {PARALLEL_TRANSCRIBE_WORKERS} worker processes...")
+
+    pool = _get_pool(model_name)
+    futures = [pool.submit(_transcribe_chunk, chunk, offset, language) for chunk, offset in chunks]
+    return _stitch((future.result() for future in futures), len(futures), on_segments)
+
+
+def should_stream_windows(audio):
+    return STREAM_WINDOW_SECONDS > 0 and len(audio) / SAMPLE_RATE > STREAM_WINDOW_SECONDS
+
+
+def transcribe_windows(audio, model, on_segments, language=None):
+    """
+    Transcribe a float32 16 kHz array window by window with an already loaded
+    model, calling on_segments(segments, final, language) after each window.
+
+    Each window is prompted with the text before it, as whisper does between
+    its own 30 s windows, and the first window's language is kept for the rest.
+    The caller must have the model to itself (ModelRegistry.use()).
+    """
+    chunks = _split(audio, STREAM_WINDOW_SECONDS)
+
+    def windows():
+        nonlocal language
+        previous = ''
+        for chunk, offset in chunks:
+            result = model.transcribe(chunk, language=language, initial_prompt=previous[-500:] or None)
+            language = language or result.get('language')
+            previous += result.get('text', '')
+            yield _shift_segments(result, offset)
+
+    return _stitch(windows(), len(chunks), on_segments)
@@ -0,0 +1,114 @@
+"""
+Stage graph executor shared by the video pipelines.
+
+A pipeline declares named stages and the stages each one depends on;
+run() starts every stage as soon as its dependencies have finished, so
+independent work (the background video download, TTS and subtitle
+writing, other target languages) overlaps instead of running in a fixed
+order. Stages run on a thread pool per run: they wait on downloads,
+ffmpeg, the translator and TTS, and Whisper already has its own process
+pool. The start and end of every stage are recorded, and the critical
+path, the chain of dependent stages that bounded the wall time, is
+reported on the job.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Stages of one job allowed to run at the same time
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "6"))
+
+
+class StageGraph:
+    def __init__(self, job=None, workers=STAGE_WORKERS):
+        self.job = job
+        self.workers = workers
+        self.stages = {}  # name -> (func, deps), in insertion (topological) order
+        self.timings = {}  # name -> (start, end) in seconds since run() started
+        self._lock = threading.Lock()
+
+    def add(self, name, func, deps=()):
+        """
+        Declare stage name, run as func(*results of deps).
+
+        Dependencies have to be added first, which keeps the graph acyclic.
+        Returns name, so calls can be chained into later deps.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(missing)}")
+        self.stages[name] = (func, tuple(deps))
+        return name
+
+    def run(self, progress=None):
+        """
+        Run every stage and return their results keyed by stage name.
+
+        progress is an optional (start, end) range of job progress to spread
+        over the stages. The first stage to fail cancels the stages that
+        haven't started, waits for the running ones and re-raises its error.
+        """
+        results = {}
+        pending = dict(self.stages)
+        running = {}  # future -> stage name
+        self._t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stage") as threads:
+            try:
+                while pending or running:
+                    for name, (func, deps) in list(pending.items()):
+                        if all(d in results for d in deps):
+                            del pending[name]
+                            args = [results[d] for d in deps]
+                            running[threads.submit(self._call, name, func, args)] = name
+                    self._report(running.values(), len(results), progress)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        results[name] = future.result()
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+        if self.job is not None:
+            seconds, path = self.critical_path()
+            self.job.record_critical_path(seconds, path, time.perf_counter() - self._t0)
+        return results
+
+    def critical_path(self):
+        """(seconds, stage names) of the longest chain of dependent stages by run time."""
+        best = {}
+        for name, (_, deps) in self.stages.items():
+            if name not in self.timings:
+                continue
+            start, end = self.timings[name]
+            before = max((best[d] for d in deps if d in best), default=(0.0, []), key=lambda b: b[0])
+            best[name] = (before[0] + end - start, before[1] + [name])
+        return max(best.values(), default=(0.0, []), key=lambda b: b[0])
+
+    def _call(self, name, func, args):
+        # Timed from inside the worker, so waiting for a free thread doesn't count
+        self._mark(name, start=True)
+        try:
+            return func(*args)
+        finally:
+            self._mark(name, start=False)
+
+    def _mark(self, name, start):
+        now = time.perf_counter() - self._t0
+        with self._lock:
+            if start:
+                self.timings[name] = (now, now)
+            else:
+                self.timings[name] = (self.timings[name][0], now)
+
+    def _report(self, running, finished, progress):
+        if self.job is None:
+            return
+        fraction = None
+        if progress:
+            low, high = progress
+            fraction = low + (high - low) * finished / max(len(self.stages), 1)
+        self.job.update(stage=', '.join(sorted(running)) or None, progress=fraction)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Storage lifecycle manager for uploads/ and static/.
+
+Every artifact the pipeline writes is recorded in a SQLite manifest with
+its folder, kind, size and last access. A background sweeper (or the CLI)
+deletes artifacts past their folder's TTL and then evicts the least
+recently used ones until each folder is back under its byte quota.
+
+Usage:
+    python storage.py status [--files]
+    python storage.py sweep
+    python storage.py reindex
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from cache import CACHE_FOLDER
+
+STORAGE_MANIFEST_PATH = os.getenv("STORAGE_MANIFEST_PATH", os.path.join(CACHE_FOLDER, "storage_manifest.db"))
+# Per-folder limits; a TTL or quota of 0 disables that rule
+STORAGE_POLICIES = {
+    'uploads': {
+        'max_bytes': int(os.getenv("UPLOADS_MAX_BYTES", str(20 * 1024 ** 3))),
+        'ttl_seconds': int(os.getenv("UPLOADS_TTL_SECONDS", str(7 * 24 * 3600))),
+    },
+    'static': {
+        'max_bytes': int(os.getenv("STATIC_MAX_BYTES", str(50 * 1024 ** 3))),
+        'ttl_seconds': int(os.getenv("STATIC_TTL_SECONDS", str(30 * 24 * 3600))),
+    },
+}
+# Artifacts touched this recently are never deleted (a job may still be using them)
+STORAGE_GRACE_SECONDS = int(os.getenv("STORAGE_GRACE_SECONDS", "3600"))
+STORAGE_SWEEP_INTERVAL = int(os.getenv("STORAGE_SWEEP_INTERVAL", "600"))
+
+
+def artifact_kind(file_name):
+    """Classify an artifact by the naming conventions used in app.py."""
+    if file_name.endswith('_hls'):
+        return 'hls'
+    if file_name.endswith('.mp4'):
+        if '_burned' in file_name:
+            return 'burned_video'
+        if '_translated' in file_name or '_educational' in file_name:
+            return 'translated_video'
+        return 'video'
+    if file_name.endswith('.srt'):
+        return 'subtitles'
+    if file_name.endswith('.mp3'):
+        return 'tts_audio'
+    if file_name.endswith('.wav'):
+        return 'audio'
+    if file_name.endswith('_batch.json'):
+        return 'batch_manifest'
+    return 'file'
+
+
+def artifact_size(path):
+    """Bytes used by a file, or by everything under a directory (an HLS package)."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+class StorageManager:
+    def __init__(self, path=STORAGE_MANIFEST_PATH, policies=None):
+        self.policies = policies or STORAGE_POLICIES
+        self._lock = threading.Lock()
+        self._sweeper = None
+        # path key -> last access not yet written to the manifest (see touch())
+        self._touched = {}
+        self._touched_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                job_id TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_folder_access ON artifacts (folder, last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(path):
+        return os.path.relpath(os.path.abspath(path)).replace('\\', '/')
+
+    def record(self, path, job_id=None, kind=None):
+        """Add (or refresh) an artifact in the manifest once it is written."""
+        if not path or not os.path.exists(path):
+            return
+        key = self._key(path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (path, folder, kind, job_id, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, COALESCE((SELECT created_at FROM artifacts WHERE path = ?), ?), ?)",
+                (key, key.split('/')[0], kind or artifact_kind(os.path.basename(key)), job_id,
+                 artifact_size(path), key, now, now)
+            )
+            self._conn.commit()
+
+    def touch(self, path):
+        """
+        Mark an artifact as used (e.g. when it is served). This is called for
+        every response, HLS segments included, so it only notes the time in
+        memory; flush_touches() writes them to the manifest in one transaction.
+        """
+        with self._touched_lock:
+            self._touched[self._key(path)] = time.time()
+
+    def flush_touches(self):
+        """Write the access times noted by touch() since the last flush."""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE artifacts SET last_access = MAX(last_access, ?) WHERE path = ?",
+                [(when, key) for key, when in touched.items()]
+            )
+            self._conn.commit()
+
+    def reindex(self):
+        """Adopt files on disk that the manifest doesn't know yet; drop rows for missing files."""
+        added = 0
+        for folder in self.policies:
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if not (os.path.isfile(path) or artifact_kind(name) == 'hls'):
+                    continue
+                with self._lock:
+                    known = self._conn.execute("SELECT 1 FROM artifacts WHERE path = ?", (self._key(path),)).fetchone()
+                    if known:
+                        continue
+                    mtime = os.path.getmtime(path)
+                    self._conn.execute(
+                        "INSERT INTO artifacts (path, folder, kind, job_id, size, created_at, last_access) "
+                        "VALUES (?, ?, ?, NULL, ?, ?, ?)",
+                        (self._key(path), folder, artifact_kind(name), artifact_size(path), mtime, mtime)
+                    )
+                    self._conn.commit()
+                added += 1
+        removed = self._drop_missing()
+        return {'added': added, 'removed': removed}
+
+    def sweep(self):
+        """Apply TTLs, then per-folder quotas (least recently used first)."""
+        deleted = []
+        now = time.time()
+        protected_after = now - STORAGE_GRACE_SECONDS
+        self.flush_touches()
+        self._drop_missing()
+        for folder, policy in self.policies.items():
+            if policy.get('ttl_seconds'):
+                cutoff = min(now - policy['ttl_seconds'], protected_after)
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT path, size FROM artifacts WHERE folder = ? AND last_access < ?",
+                        (folder, cutoff)
+                    ).fetchall()
+                deleted += self._delete(rows)
+
+            if policy.get('max_bytes'):
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT path, size, last_access FROM artifacts WHERE folder = ? ORDER BY last_access",
+                        (folder,)
+                    ).fetchall()
+                total = sum(size for _, size, _ in rows)
+                victims = []
+                for path, size, last_access in rows:
+                    if total <= policy['max_bytes'] or last_access >= protected_after:
+                        break
+                    victims.append((path, size))
+                    total -= size
+                deleted += self._delete(victims)
+        if deleted:
+            print(f"Storage sweep removed {len(deleted)} artifacts")
+        return deleted
+
+    def status(self, with_files=False):
+        """Per-folder usage from the manifest (no directory scan)."""
+        self.flush_touches()
+        report = {}
+        with self._lock:
+            for folder, policy in self.policies.items():
+                kinds = {
+                    kind: {'count': count, 'bytes': size}
+                    for kind, count, size in self._conn.execute(
+                        "SELECT kind, COUNT(*), SUM(size) FROM artifacts WHERE folder = ? GROUP BY kind",
+                        (folder,)
+                    )
+                }
+                entry = {
+                    'bytes': sum(k['bytes'] for k in kinds.values()),
+                    'count': sum(k['count'] for k in kinds.values()),
+                    'max_bytes': policy.get('max_bytes'),
+                    'ttl_seconds': policy.get('ttl_seconds'),
+                    'kinds': kinds,
+                }
+                if with_files:
+                    entry['files'] = [
+                        {'path': path, 'kind': kind, 'job_id': job_id, 'size': size,
+                         'created_at': created_at, 'last_access': last_access}
+                        for path, kind, job_id, size, created_at, last_access in self._conn.execute(
+                            "SELECT path, kind, job_id, size, created_at, last_access FROM artifacts "
+                            "WHERE folder = ? ORDER BY path",
+                            (folder,)
+                        )
+                    ]
+                report[folder] = entry
+        return report
+
+    def start_sweeper(self, interval=STORAGE_SWEEP_INTERVAL, extra_sweeps=()):
+        """
+        Run sweep() every interval seconds on a daemon thread, followed by
+        each of extra_sweeps (callables cleaning up other folders).
+        """
+        if self._sweeper is not None:
+            return
+
+        def loop():
+            while True:
+                for sweep in (self.sweep,) + tuple(extra_sweeps):
+                    try:
+                        sweep()
+                    except Exception as e:
+                        print(f"Storage sweep ({getattr(sweep, '__name__', sweep)}) failed:", e)
+                time.sleep(interval)
+
+        self._sweeper = threading.Thread(target=loop, name="storage-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _delete(self, rows):
+        deleted = []
+        for path, _ in rows:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                deleted.append(path)
+            except OSError as e:
+                print(f"Could not delete {path}:", e)
+        with self._lock:
+            self._conn.executemany("DELETE FROM artifacts WHERE path = ?", [(p,) for p in deleted])
+            self._conn.commit()
+        return deleted
+
+    def _drop_missing(self):
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM artifacts")]
+            missing = [(p,) for p in paths if not os.path.exists(p)]
+            self._conn.executemany("DELETE FROM artifacts WHERE path = ?", missing)
+            self._conn.commit()
+        return len(missing)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage uploads/ and static/ artifacts")
+    sub = parser.add_subparsers(dest='command', required=True)
+    status_cmd = sub.add_parser('status', help='show per-folder usage from the manifest')
+    status_cmd.add_argument('--files', action='store_true', help='list every artifact')
+    sub.add_parser('sweep', help='apply TTLs and quotas now')
+    sub.add_parser('reindex', help='adopt untracked files and drop rows for missing ones')
+    args = parser.parse_args()
+
+    manager = StorageManager()
+    if args.command == 'status':
+        for folder, entry in manager.status(with_files=args.files).items():
+            quota = entry['max_bytes'] / (1024 * 1024) if entry['max_bytes'] else 0
+            print(f"{folder}: {entry['count']} files, {entry['bytes'] / (1024 * 1024):.2f} MB"
+                  f" (quota {quota:.0f} MB, ttl {entry['ttl_seconds']}s)")
+            for kind, k in sorted(entry['kinds'].items()):
+                print(f"   {kind}: {k['count']} files, {k['bytes'] / (1024 * 1024):.2f} MB")
+            for f in entry.get('files', []):
+                print(f"   {f['path']} ({f['size'] / (1024 * 1024):.2f} MB, {f['kind']})")
+    elif args.command == 'sweep':
+        deleted = manager.sweep()
+        print(f"Removed {len(deleted)} artifacts")
+        for path in deleted:
+            print("  ", path)
+    elif args.command == 'reindex':
+        print(manager.reindex())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import importlib
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app modules live next to this folder and import each other by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Module-level caches and job checkpoints default to folders in the working
+# directory; point them somewhere disposable before anything imports them
+_scratch = tempfile.mkdtemp(prefix="myvideo-tests-")
+os.environ.setdefault("CACHE_FOLDER", os.path.join(_scratch, "cache"))
+os.environ.setdefault("JOBS_FOLDER", os.path.join(_scratch, "jobs"))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app module, when its dependencies are installed."""
+    for dependency in ("flask", "numpy", "whisper", "ffmpeg", "yt_dlp", "pysrt"):
+        pytest.importorskip(dependency)
+    # app creates its upload/output/cache folders in the working directory
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("app")
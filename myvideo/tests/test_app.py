@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from jobs import Job
+
+
+def test_early_translation_does_not_hold_up_transcription(app, monkeypatch):
+    np = pytest.importorskip("numpy")
+    second_window_decoded = threading.Event()
+    translated_after_second_window = []
+
+    def fake_transcribe(audio, whisper_model, on_segments, job):
+        first = [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': 'one'}]
+        second = [{'id': 1, 'start': 1.0, 'end': 2.0, 'text': 'two'}]
+        on_segments(first, False, 'en')
+        # A synchronous translation would still be waiting on this event here
+        second_window_decoded.set()
+        on_segments(second, True, 'en')
+        return {'text': 'one two', 'language': 'en', 'segments': first + second}
+
+    def fake_translate(segments, lang, language):
+        translated_after_second_window.append(second_window_decoded.wait(5))
+        return [dict(s, text=s['text'].upper()) for s in segments]
+
+    monkeypatch.setattr(app, 'prepare_audio', lambda source, wav: np.zeros(32000, dtype=np.float32))
+    monkeypatch.setattr(app, 'transcribe_audio', fake_transcribe)
+    monkeypatch.setattr(app, 'translate_segments', fake_translate)
+    job = Job('test', {})
+    app.transcribe_job_source(job, 'clip.mp4', 'tiny', target_langs=('es', 'en'))
+
+    assert translated_after_second_window == [True]
+    # The transcribe stage returns only once the early translation is in
+    translations = [e['data'] for e in job.events if e['event'] == 'translation']
+    assert translations == [{'lang': 'es', 'segments': [{'id': 0, 'start': 0.0, 'end': 1.0, 'text': 'ONE'}]}]
+
+
+@pytest.mark.parametrize('size', ['12abc', -1, 1.5, True])
+def test_create_upload_rejects_a_bad_size(app, size):
+    response = app.app.test_client().post('/uploads', json={'filename': 'clip.mp4', 'size': size})
+    assert response.status_code == 400
+    assert 'size' in response.get_json()['error']
@@ -0,0 +1,32 @@
+"""The app has to import: module-level setup must not use names defined further down."""
+import glob
+import os
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_no_undefined_names():
+    pyflakes_api = pytest.importorskip("pyflakes.api")
+    from pyflakes import messages, reporter
+
+    class Collect(reporter.Reporter):
+        def __init__(self):
+            super().__init__(None, None)
+            self.found = []
+
+        def flake(self, message):
+            if isinstance(message, messages.UndefinedName):
+                self.found.append(str(message))
+
+    collected = Collect()
+    for path in sorted(glob.glob(os.path.join(APP_DIR, "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            pyflakes_api.check(f.read(), path, collected)
+    assert collected.found == []
+
+
+def test_app_imports(app):
+    # The app fixture (conftest.py) imports app when its dependencies are installed
+    assert "/jobs/<job_id>" in {rule.rule for rule in app.app.url_map.iter_rules()}
@@ -0,0 +1,62 @@
+import pytest
+
+import backends
+import tts
+from backends import SPEECH_ENGINES, TRANSLATORS, get_speech_engine, get_translator
+
+
+class FakeEngine:
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def synthesize(self, text, lang, output_path):
+        self.calls.append((text, lang))
+        with open(output_path, 'wb') as f:
+            f.write(f"{lang}:{text}".encode('utf-8'))
+
+
+@pytest.fixture(autouse=True)
+def fresh_instances(monkeypatch):
+    monkeypatch.setattr(backends, '_instances', {})
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Choose from: google, marian"):
+        get_translator('nope')
+    with pytest.raises(ValueError, match="gtts"):
+        get_speech_engine('nope')
+
+
+def test_backends_are_shared_instances():
+    assert get_speech_engine('espeak') is get_speech_engine('espeak')
+    assert isinstance(get_translator('google'), TRANSLATORS['google'])
+
+
+def test_configured_backend_is_used(monkeypatch):
+    monkeypatch.setitem(SPEECH_ENGINES, 'fake', FakeEngine)
+    monkeypatch.setattr(backends, 'TTS_BACKEND', 'fake')
+    assert get_speech_engine().name == 'fake'
+    assert get_speech_engine('gtts').name == 'gtts'
+
+
+def test_speech_is_cached_per_engine(monkeypatch):
+    monkeypatch.setitem(SPEECH_ENGINES, 'fake', FakeEngine)
+    monkeypatch.setattr(backends, 'TTS_BACKEND', 'fake')
+    first = tts.synthesize_clip('hola backends', 'es')
+    second = tts.synthesize_clip('hola backends', 'es')
+    assert first == second
+    assert get_speech_engine().calls == [('hola backends', 'es')]
+    with open(first, 'rb') as f:
+        assert f.read() == b'es:hola backends'
+
+
+def test_piper_needs_a_voice_for_the_language(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, 'PIPER_VOICE_DIR', str(tmp_path))
+    (tmp_path / "hi_IN-b-medium.onnx").write_bytes(b'')
+    (tmp_path / "hi_IN-a-medium.onnx").write_bytes(b'')
+    engine = SPEECH_ENGINES['piper']()
+    assert engine.voice_for('hi').endswith("hi_IN-a-medium.onnx")
+    with pytest.raises(ValueError, match="No piper voice for 'es'"):
+        engine.voice_for('es')
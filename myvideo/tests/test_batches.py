@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+import pytest
+
+import batches
+import jobs
+from batches import Batch, BatchError, BatchManager
+from jobs import JobQueue
+
+
+@pytest.fixture(autouse=True)
+def single_attempt(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_MAX_ATTEMPTS', 1)
+
+
+def wait_for(manager, batch_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        manifest = manager.get(batch_id)
+        if manifest['status'] in batches.FINISHED:
+            return manifest
+        time.sleep(0.01)
+    raise AssertionError(f"{batch_id} did not finish")
+
+
+def test_items_run_and_the_manifest_is_written(tmp_path):
+    def pipeline(job, youtube_url, uid, target_lang):
+        return {'url': youtube_url, 'lang': target_lang}
+
+    manager = BatchManager(JobQueue(workers=2), str(tmp_path))
+    batch = manager.submit(Batch('youtube_educational', pipeline, {}, urls=['u1', 'u2', 'u1'], target_langs=['hi', 'ta']))
+    manifest = wait_for(manager, batch.id)
+    assert manifest['status'] == 'done'
+    assert manifest['counts'] == {'done': 4}
+    assert [(item['url'], item['target_lang']) for item in manifest['items']] == [
+        ('u1', 'hi'), ('u1', 'ta'), ('u2', 'hi'), ('u2', 'ta')]
+    assert all(item['result']['url'] == item['url'] for item in manifest['items'])
+    assert os.path.exists(os.path.join(str(tmp_path), f"{batch.id}_batch.json"))
+    assert manifest['manifest_url'] == f"/static/{batch.id}_batch.json"
+
+
+def test_languages_of_one_video_run_after_the_first(tmp_path):
+    running = {}
+    lock = threading.Lock()
+    overlaps = []
+
+    def pipeline(job, youtube_url, uid, target_lang):
+        with lock:
+            if running.get(youtube_url):
+                overlaps.append(youtube_url)
+            running[youtube_url] = running.get(youtube_url, 0) + 1
+        time.sleep(0.05)
+        with lock:
+            running[youtube_url] -= 1
+
+    manager = BatchManager(JobQueue(workers=4), str(tmp_path))
+    batch = manager.submit(Batch('youtube_educational', pipeline, {}, urls=['u1'], target_langs=['hi', 'ta'],
+                                 concurrency=4))
+    assert wait_for(manager, batch.id)['counts'] == {'done': 2}
+    assert overlaps == []
+
+
+def test_failed_items_are_reported(tmp_path):
+    def pipeline(job, youtube_url, uid):
+        if youtube_url == 'bad':
+            raise RuntimeError("video unavailable")
+
+    manager = BatchManager(JobQueue(workers=1), str(tmp_path))
+    batch = manager.submit(Batch('youtube', pipeline, {}, urls=['good', 'bad']))
+    manifest = wait_for(manager, batch.id)
+    assert manifest['status'] == 'done'
+    assert manifest['counts'] == {'done': 1, 'failed': 1}
+    assert manifest['items'][1]['error'] == 'video unavailable'
+
+
+def test_playlist_is_expanded_in_the_background(tmp_path):
+    def pipeline(job, youtube_url, uid):
+        return youtube_url
+
+    manager = BatchManager(JobQueue(workers=1), str(tmp_path), expand_playlist=lambda url: ['p1', 'p2'])
+    batch = manager.submit(Batch('youtube', pipeline, {}, urls=['extra'], playlist_url='https://playlist'))
+    manifest = wait_for(manager, batch.id)
+    assert [item['url'] for item in manifest['items']] == ['extra', 'p1', 'p2']
+
+
+def test_playlist_expansion_failure_fails_the_batch(tmp_path):
+    def expand(url):
+        raise RuntimeError("playlist is private")
+
+    manager = BatchManager(JobQueue(workers=1), str(tmp_path), expand_playlist=expand)
+    batch = manager.submit(Batch('youtube', lambda job, **params: None, {}, playlist_url='https://playlist'))
+    manifest = wait_for(manager, batch.id)
+    assert manifest['status'] == 'failed'
+    assert manifest['error'] == 'playlist is private'
+
+
+def test_forgotten_batches_are_read_from_their_manifest(tmp_path, monkeypatch):
+    manager = BatchManager(JobQueue(workers=1), str(tmp_path))
+    batch = manager.submit(Batch('youtube', lambda job, **params: None, {}, urls=['u1']))
+    wait_for(manager, batch.id)
+    monkeypatch.setattr(batches, 'BATCH_RETENTION_SECONDS', -1)
+    manager.submit(Batch('youtube', lambda job, **params: None, {}, urls=['u2']))
+    assert batch.id not in manager.batches
+    assert manager.get(batch.id)['counts'] == {'done': 1}
+    assert manager.get('batch-unknown') is None
+
+
+def test_batch_limits(tmp_path, monkeypatch):
+    manager = BatchManager(JobQueue(workers=1), str(tmp_path))
+    with pytest.raises(BatchError):
+        manager.submit(Batch('youtube', None, {}, urls=[' ', '']))
+    monkeypatch.setattr(batches, 'BATCH_MAX_ITEMS', 3)
+    with pytest.raises(BatchError):
+        manager.submit(Batch('youtube_educational', None, {}, urls=['u1', 'u2'], target_langs=['hi', 'ta']))
+    assert Batch('youtube', None, {}, concurrency=100).concurrency == batches.BATCH_MAX_CONCURRENCY
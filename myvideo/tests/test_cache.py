@@ -0,0 +1,157 @@
+import os
+import time
+
+import pytest
+
+from cache import DiskLRUCache, DownloadCache, EntryTooLargeError, TranscriptionCache, TTSCache
+
+
+def store(cache, key, size):
+    tmp_path = cache.path_for(key) + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b'x' * size)
+    path = cache.store(key, tmp_path)
+    # Keep modification times apart so LRU order doesn't depend on timer resolution
+    time.sleep(0.01)
+    return path
+
+
+def test_store_and_lookup(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=100, suffix=".bin")
+    path = store(cache, 'a', 10)
+    assert path == os.path.join(str(tmp_path), 'a.bin')
+    assert cache.lookup('a') == path
+    assert cache.lookup('b') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 1, 1, 10)
+
+
+def test_lookup_without_counting(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=100)
+    store(cache, 'a', 10)
+    assert cache.lookup('a', count=False) is not None
+    assert cache.lookup('b', count=False) is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=25)
+    store(cache, 'a', 10)
+    store(cache, 'b', 10)
+    cache.lookup('a')
+    time.sleep(0.01)
+    store(cache, 'c', 10)
+    assert sorted(os.listdir(str(tmp_path))) == ['a', 'c']
+    assert cache.stats()['bytes'] == 20
+
+
+def test_replacing_an_entry_keeps_the_size_right(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=100)
+    store(cache, 'a', 10)
+    store(cache, 'a', 30)
+    assert cache.stats()['bytes'] == 30
+
+
+def test_index_is_loaded_from_disk(tmp_path):
+    first = DiskLRUCache(str(tmp_path), max_bytes=100)
+    store(first, 'a', 10)
+    store(first, 'b', 20)
+    reopened = DiskLRUCache(str(tmp_path), max_bytes=100)
+    assert reopened.stats()['bytes'] == 30
+    assert reopened.stats()['entries'] == 2
+
+
+def test_files_sharing_a_stem_are_evicted_together(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=30)
+    store(cache, 'a.mp4', 10)
+    store(cache, 'a.json', 5)
+    store(cache, 'b.mp4', 20)
+    assert sorted(os.listdir(str(tmp_path))) == ['b.mp4']
+
+
+def test_transcription_cache_round_trip(tmp_path):
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b'RIFF0000WAVE')
+    cache = TranscriptionCache(folder=str(tmp_path / "transcripts"))
+    key = TranscriptionCache.key_for(str(audio), 'tiny')
+    assert key != TranscriptionCache.key_for(str(audio), 'base')
+    assert cache.get(key) is None
+    cache.put(key, {'text': 'hi', 'language': 'en', 'segments': [{'start': 0.0, 'end': 1.0, 'text': 'hi'}],
+                    'tokens': [1, 2]})
+    assert cache.get(key) == {'text': 'hi', 'language': 'en',
+                              'segments': [{'start': 0.0, 'end': 1.0, 'text': 'hi'}]}
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = TranscriptionCache(folder=str(tmp_path))
+    with open(cache.path_for('broken'), 'w') as f:
+        f.write('{"text": ')
+    assert cache.get('broken') is None
+
+
+def test_decoded_audio_is_keyed_by_content():
+    np = pytest.importorskip("numpy")
+    audio = np.linspace(-1, 1, 16000, dtype=np.float32)
+    assert TranscriptionCache.key_for(audio, 'tiny') == TranscriptionCache.key_for(audio.copy(), 'tiny')
+    assert TranscriptionCache.key_for(audio, 'tiny') != TranscriptionCache.key_for(audio[::-1].copy(), 'tiny')
+
+
+def test_tts_cache_keys_cover_text_language_and_engine():
+    key = TTSCache.key_for('hola', 'es', 'gtts')
+    assert key == TTSCache.key_for('hola', 'es', 'gtts')
+    assert key != TTSCache.key_for('hola', 'pt', 'gtts')
+    assert key != TTSCache.key_for('hola', 'es', 'other')
+    assert key != TTSCache.key_for('Hola', 'es', 'gtts')
+
+
+def test_download_cache_round_trip(tmp_path):
+    cache = DownloadCache(folder=str(tmp_path / "downloads"), max_bytes=1000)
+    assert cache.get('abc') is None
+    download = tmp_path / "video.mp4"
+    download.write_bytes(b'x' * 10)
+    media_path = cache.put('abc', str(download), {'title': 'A video'})
+    assert media_path == os.path.join(cache.folder, 'abc.mp4')
+    assert not download.exists()
+    path, meta = cache.get('abc')
+    assert path == media_path
+    assert (meta['id'], meta['title'], meta['filename']) == ('abc', 'A video', 'abc.mp4')
+
+
+def test_source_keys_depend_on_source_and_model():
+    key = TranscriptionCache.key_for_source('youtube:abc', 'tiny')
+    assert key == TranscriptionCache.key_for_source('youtube:abc', 'tiny')
+    assert key != TranscriptionCache.key_for_source('youtube:abd', 'tiny')
+    assert key != TranscriptionCache.key_for_source('youtube:abc', 'base')
+
+
+def test_the_entry_being_stored_is_never_evicted(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=30)
+    store(cache, 'a.json', 5)
+    store(cache, 'b.mp4', 20)
+    # b.json brings b's entry over the budget on its own; only a goes
+    store(cache, 'b.json', 15)
+    assert sorted(os.listdir(str(tmp_path))) == ['b.json', 'b.mp4']
+
+
+def test_pinned_entries_are_not_evicted(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=25)
+    store(cache, 'a', 10)
+    store(cache, 'b', 10)
+    cache.pin('a')
+    store(cache, 'c', 10)
+    assert sorted(os.listdir(str(tmp_path))) == ['a', 'c']
+    cache.unpin('a')
+    store(cache, 'd', 10)
+    assert sorted(os.listdir(str(tmp_path))) == ['c', 'd']
+
+
+def test_a_file_over_the_budget_is_rejected(tmp_path):
+    cache = DownloadCache(folder=str(tmp_path / "downloads"), max_bytes=10)
+    download = tmp_path / "video.mp4"
+    download.write_bytes(b'x' * 20)
+    with pytest.raises(EntryTooLargeError):
+        cache.put('abc', str(download), {'title': 'Too long'})
+    # The download is left for the caller and nothing dead is cached
+    assert download.exists()
+    assert os.listdir(cache.folder) == []
+    assert cache.get('abc') is None
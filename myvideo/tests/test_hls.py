@@ -0,0 +1,49 @@
+import hls
+from hls import DEFAULT_MPEGTS_START, add_subtitle_rendition, ladder_for, srt_to_vtt
+
+SRT = "1\r\n00:00:01,000 --> 00:00:02,500\r\nHola\r\n\r\n2\r\n00:00:03,000 --> 00:00:04,000\r\nMundo\r\n"
+
+MASTER = """#EXTM3U
+#EXT-X-VERSION:6
+#EXT-X-STREAM-INF:BANDWIDTH=3000000,RESOLUTION=1280x720
+v0/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=1300000,RESOLUTION=854x480
+v1/index.m3u8
+"""
+
+
+def test_ladder_is_capped_at_the_source_height():
+    assert [name for name, *_ in ladder_for(480)] == ['480p', '240p']
+    assert [name for name, *_ in ladder_for(144)] == ['240p']
+    assert len(ladder_for(0)) == len(hls.HLS_LADDER)
+
+
+def test_srt_to_vtt(tmp_path):
+    srt_path = tmp_path / "subs.srt"
+    srt_path.write_bytes(SRT.encode('utf-8'))
+    vtt_path = srt_to_vtt(str(srt_path), str(tmp_path / "subs.vtt"))
+    vtt = open(vtt_path, encoding='utf-8').read()
+    assert vtt.startswith(f"WEBVTT\nX-TIMESTAMP-MAP=MPEGTS:{DEFAULT_MPEGTS_START},LOCAL:00:00:00.000\n\n1\n")
+    assert "00:00:01.000 --> 00:00:02.500\nHola" in vtt
+    assert "," not in vtt.split("\n\n", 1)[1]
+    assert "\r" not in vtt
+
+
+def test_subtitle_rendition_is_referenced_from_every_variant(tmp_path, monkeypatch):
+    monkeypatch.setattr(hls, 'first_segment_start', lambda output_dir: 1000)
+    (tmp_path / "master.m3u8").write_text(MASTER)
+    srt_path = tmp_path / "subs.srt"
+    srt_path.write_text(SRT)
+    add_subtitle_rendition(str(tmp_path), str(srt_path), 'es', 4.2)
+
+    master = (tmp_path / "master.m3u8").read_text().splitlines()
+    media = [line for line in master if line.startswith('#EXT-X-MEDIA:TYPE=SUBTITLES')]
+    assert len(media) == 1 and 'LANGUAGE="es"' in media[0]
+    assert master.index(media[0]) < master.index(next(line for line in master if line.startswith('#EXT-X-STREAM-INF')))
+    variants = [line for line in master if line.startswith('#EXT-X-STREAM-INF')]
+    assert len(variants) == 2 and all(line.endswith(',SUBTITLES="subs"') for line in variants)
+
+    playlist = (tmp_path / "subs.m3u8").read_text()
+    assert "#EXT-X-TARGETDURATION:5\n" in playlist
+    assert "#EXTINF:4.200,\nsubs.vtt\n#EXT-X-ENDLIST" in playlist
+    assert "MPEGTS:1000," in (tmp_path / "subs.vtt").read_text()
@@ -0,0 +1,147 @@
+import os
+import threading
+
+import pytest
+
+import checkpoints
+import jobs
+from checkpoints import JobCheckpoint, load_manifest, sweep_checkpoints
+from jobs import JobQueue, QueueFullError
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(jobs, 'JOB_RETRY_DELAY_SECONDS', 0)
+
+
+def run(queue, func, params=None, job_id=None):
+    finished = threading.Event()
+    job = queue.submit('test', func, params or {}, job_id, on_done=lambda _: finished.set())
+    assert finished.wait(5), f"job {job.id} did not finish"
+    return job
+
+
+def test_job_result_and_status():
+    queue = JobQueue(workers=1)
+    job = run(queue, lambda job, x: {'double': x * 2}, {'x': 4})
+    assert job.status == 'done'
+    assert job.result['double'] == 8
+    assert load_manifest(job.id)['status'] == 'done'
+    assert queue.get(job.id) is job
+    assert job.to_dict()['progress'] == 1.0
+    assert job.events[-1]['event'] == 'done'
+
+
+def test_failed_job_reports_its_error():
+    def broken(job):
+        raise RuntimeError("always fails")
+
+    job = run(JobQueue(workers=1), broken)
+    assert job.status == 'failed'
+    assert job.attempts == 2
+    assert job.to_dict()['error'] == 'always fails'
+    assert load_manifest(job.id)['status'] == 'failed'
+    assert job.events[-1] == {'id': len(job.events) - 1, 'event': 'failed',
+                              'data': {'status': 'failed', 'error': 'always fails'}}
+
+
+def test_failed_attempt_is_retried():
+    calls = []
+
+    def flaky(job):
+        calls.append(job.attempts)
+        if len(calls) == 1:
+            raise RuntimeError("first attempt fails")
+        return 'ok'
+
+    job = run(JobQueue(workers=1), flaky)
+    assert job.status == 'done'
+    assert job.result == 'ok'
+    assert calls == [1, 2]
+
+
+def test_retry_skips_checkpointed_stages():
+    computed = []
+
+    def pipeline(job):
+        transcript = job.checkpoint.json_stage('transcribe', lambda: computed.append('transcribe') or {'text': 'hi'})
+        if job.attempts == 1:
+            raise RuntimeError("tts timed out")
+        return transcript
+
+    job = run(JobQueue(workers=1), pipeline)
+    assert job.status == 'done'
+    assert job.result['text'] == 'hi'
+    assert computed == ['transcribe']
+
+
+def test_resubmitting_a_job_id_resumes_from_its_checkpoints(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_MAX_ATTEMPTS', 1)
+    computed = []
+
+    def pipeline(job, fail):
+        job.checkpoint.json_stage('download', lambda: computed.append('download') or {'path': 'a.m4a'})
+        if fail:
+            raise RuntimeError("mux failed")
+        return 'ok'
+
+    queue = JobQueue(workers=1)
+    failed = run(queue, pipeline, {'fail': True})
+    assert failed.status == 'failed'
+    resumed = run(queue, pipeline, {'fail': False}, job_id=failed.id)
+    assert resumed.id == failed.id
+    assert resumed.status == 'done'
+    assert computed == ['download']
+
+
+def test_progress_is_clamped():
+    def pipeline(job):
+        job.update(stage='transcribe', progress=2)
+        return (job.stage, job.progress)
+
+    job = run(JobQueue(workers=1), pipeline)
+    assert job.result == ('transcribe', 1.0)
+
+
+def test_queue_limit():
+    release = threading.Event()
+    queue = JobQueue(workers=1, queue_limit=1)
+    queue.submit('test', lambda job: release.wait(5), {})
+    try:
+        # The first job may not have left the queue yet; either way the third can't fit
+        with pytest.raises(QueueFullError):
+            for _ in range(2):
+                queue.submit('test', lambda job: release.wait(5), {})
+    finally:
+        release.set()
+
+
+def test_checkpoint_finish_keeps_only_the_manifest(tmp_path):
+    ckpt = JobCheckpoint('abc', 'test', {}, folder=str(tmp_path))
+    ckpt.json_stage('transcribe', lambda: {'text': 'hi'})
+    ckpt.file_stage('tts', [ckpt.path('tts.mp3')], lambda: open(ckpt.path('tts.mp3'), 'w').close())
+    assert ckpt.done('tts') and ckpt.outputs('tts') == {'paths': [ckpt.path('tts.mp3')]}
+    ckpt.finish()
+    assert os.listdir(ckpt.dir) == [checkpoints.MANIFEST_NAME]
+    # The manifest survives and is picked up again by a new checkpoint for the same job
+    assert JobCheckpoint('abc', folder=str(tmp_path)).done('transcribe')
+
+
+def test_sweep_checkpoints_removes_stale_job_directories(tmp_path):
+    JobCheckpoint('old', folder=str(tmp_path))
+    JobCheckpoint('new', folder=str(tmp_path))
+    manifest_path = os.path.join(str(tmp_path), 'old', checkpoints.MANIFEST_NAME)
+    manifest = load_manifest('old', str(tmp_path))
+    checkpoints._write_json(manifest_path, dict(manifest, updated_at=0))
+    assert sweep_checkpoints(str(tmp_path), max_age=3600) == 1
+    assert os.listdir(str(tmp_path)) == ['new']
+
+
+def test_events_since_resumes_after_an_id():
+    job = run(JobQueue(workers=1), lambda job: job.emit('segments', {'n': 1}))
+    ids = [e['id'] for e in job.events]
+    assert ids == list(range(len(ids)))
+    assert 'segments' in [e['event'] for e in job.events]
+    assert job.events_since(ids[-2]) == job.events[-1:]
+    assert job.events_since(ids[-1], timeout=0) == []
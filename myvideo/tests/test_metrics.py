@@ -0,0 +1,47 @@
+import pytest
+
+from metrics import MetricsRegistry, metrics, timed_stage
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(1, 5))
+    registry.observe('whisper', 0.5)
+    registry.observe('whisper', 3)
+    registry.observe('whisper', 10)
+    lines = registry.render().splitlines()
+    assert 'pipeline_stage_duration_seconds_bucket{stage="whisper",le="1"} 1' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="whisper",le="5"} 2' in lines
+    assert 'pipeline_stage_duration_seconds_bucket{stage="whisper",le="+Inf"} 3' in lines
+    assert 'pipeline_stage_duration_seconds_sum{stage="whisper"} 13.500000' in lines
+    assert 'pipeline_stage_duration_seconds_count{stage="whisper"} 3' in lines
+
+
+def test_counters_are_rendered_with_sorted_labels():
+    registry = MetricsRegistry()
+    registry.inc('jobs', status='completed', kind='process')
+    registry.inc('jobs', status='completed', kind='process')
+    registry.inc('audio_seconds', 12.5)
+    lines = registry.render().splitlines()
+    assert 'pipeline_jobs_total{kind="process",status="completed"} 2' in lines
+    assert 'pipeline_audio_seconds_total 12.5' in lines
+    assert '# TYPE pipeline_stage_errors_total counter' in lines
+
+
+def test_render_ends_with_a_newline():
+    assert MetricsRegistry().render().endswith('\n')
+
+
+
+def test_failed_stage_is_timed_and_counted():
+    with pytest.raises(RuntimeError):
+        with timed_stage('test_failing_stage'):
+            raise RuntimeError('boom')
+    lines = metrics.render().splitlines()
+    assert 'pipeline_stage_duration_seconds_count{stage="test_failing_stage"} 1' in lines
+    assert 'pipeline_stage_errors_total{stage="test_failing_stage"} 1' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc('jobs', kind='a"b\\c\nd', status='failed')
+    assert 'pipeline_jobs_total{kind="a\\"b\\\\c\\nd",status="failed"} 1' in registry.render().splitlines()
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("whisper")
+
+import model_registry  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+
+class FakeParameter:
+    def __init__(self, mb):
+        self.mb = mb
+
+    def numel(self):
+        return int(self.mb * 1024 * 1024)
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    def __init__(self, name, mb):
+        self.name = name
+        self.mb = mb
+
+    def parameters(self):
+        return [FakeParameter(self.mb)]
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    loaded = []
+
+    def load_model(name):
+        loaded.append(name)
+        return FakeModel(name, model_registry.ESTIMATED_MODEL_MB[name.split('.')[0]])
+
+    monkeypatch.setattr(model_registry.whisper, 'load_model', load_model)
+    return loaded
+
+
+def test_models_are_loaded_once(loads):
+    registry = ModelRegistry(budget_mb=1000)
+    assert registry.get('tiny') is registry.get('tiny')
+    assert loads == ['tiny']
+    assert registry.loaded() == {'tiny': 150.0}
+
+
+def test_least_recently_used_model_makes_room(loads):
+    registry = ModelRegistry(budget_mb=500)
+    registry.get('tiny')
+    registry.get('base')
+    registry.get('tiny')
+    # small needs 970 MB: both go, even though the budget is smaller than the model
+    registry.get('small')
+    assert list(registry.loaded()) == ['small']
+    registry.get('tiny')
+    assert list(registry.loaded()) == ['tiny']
+    assert loads == ['tiny', 'base', 'small', 'tiny']
+
+
+def test_eviction_order_follows_use(loads):
+    registry = ModelRegistry(budget_mb=500)
+    registry.get('tiny')
+    registry.get('base')
+    registry.get('tiny')
+    registry.get('base')
+    registry.get('tiny')
+    assert list(registry.loaded()) == ['base', 'tiny']
+    registry.get('tiny.en')
+    # base was used least recently
+    assert list(registry.loaded()) == ['tiny', 'tiny.en']
+
+
+def test_unknown_model_is_rejected(loads):
+    with pytest.raises(ValueError):
+        ModelRegistry().get('enormous')
+    assert loads == []
+
+
+def test_a_model_is_used_by_one_caller_at_a_time(loads):
+    registry = ModelRegistry(budget_mb=500)
+    inside = []
+    overlaps = []
+
+    def decode():
+        with registry.use('tiny') as model:
+            inside.append(model)
+            overlaps.append(len(inside))
+            time.sleep(0.02)
+            inside.remove(model)
+
+    threads = [threading.Thread(target=decode) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1, 1, 1, 1]
+    assert loads == ['tiny']
+
+
+def test_different_models_are_used_side_by_side(loads):
+    registry = ModelRegistry(budget_mb=500)
+    with registry.use('tiny') as tiny:
+        with registry.use('base') as base:
+            assert (tiny.name, base.name) == ('tiny', 'base')
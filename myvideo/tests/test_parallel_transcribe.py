@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("whisper")
+
+import parallel_transcribe  # noqa: E402
+from parallel_transcribe import SAMPLE_RATE, find_split_points, transcribe_parallel  # noqa: E402
+
+
+class FakeModel:
+    """Stands in for a worker's Whisper model: one segment per second of audio."""
+
+    def __init__(self, language='en'):
+        self.language = language
+        self.calls = []
+
+    def transcribe(self, audio, language=None, **kwargs):
+        self.calls.append((len(audio), language, kwargs))
+        seconds = int(len(audio) / SAMPLE_RATE)
+        segments = [{'start': float(i), 'end': i + 1.0, 'text': f" s{len(self.calls)}.{i}"} for i in range(seconds)]
+        return {'text': ''.join(s['text'] for s in segments), 'language': language or self.language,
+                'segments': segments}
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(parallel_transcribe, '_worker_model', model)
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(parallel_transcribe, '_get_pool', lambda model_name: pool)
+    yield model
+    pool.shutdown()
+
+
+def tone(seconds, quiet_at=()):
+    audio = np.full(int(seconds * SAMPLE_RATE), 0.5, dtype=np.float32)
+    for at in quiet_at:
+        audio[int(at * SAMPLE_RATE):int((at + 0.5) * SAMPLE_RATE)] = 0.0
+    return audio
+
+
+def test_cuts_land_on_the_quietest_point_near_each_boundary():
+    audio = tone(100, quiet_at=[27, 58])
+    splits = find_split_points(audio, chunk_seconds=30, search_seconds=5)
+    assert len(splits) == 3
+    assert 27 <= splits[0] / SAMPLE_RATE <= 27.5
+    # The next boundary is measured from the previous cut
+    assert 57 <= splits[1] / SAMPLE_RATE <= 58.5
+
+
+def test_short_audio_is_not_cut():
+    assert find_split_points(tone(20), chunk_seconds=30, search_seconds=5) == []
+    assert find_split_points(np.zeros(0, dtype=np.float32)) == []
+
+
+class FakeProcessPool:
+    def __init__(self, **kwargs):
+        self.model_name = kwargs['initargs'][0]
+        self.shut_down = False
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_pools_are_kept_per_model_least_recently_used_first(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, 'ProcessPoolExecutor', FakeProcessPool)
+    monkeypatch.setattr(parallel_transcribe, '_pools', OrderedDict())
+    monkeypatch.setattr(parallel_transcribe, 'PARALLEL_TRANSCRIBE_MAX_POOLS', 2)
+    tiny = parallel_transcribe._get_pool('tiny')
+    base = parallel_transcribe._get_pool('base')
+    assert parallel_transcribe._get_pool('tiny') is tiny
+    small = parallel_transcribe._get_pool('small')
+    assert base.shut_down and not tiny.shut_down
+    assert list(parallel_transcribe._pools) == ['tiny', 'small']
+    assert small.model_name == 'small'
+
+
+def test_chunks_are_stitched_with_global_timings(fake_pool, monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, 'find_split_points', lambda audio, *args: [3 * SAMPLE_RATE])
+    result = transcribe_parallel(tone(5), 'tiny')
+    segments = result['segments']
+    assert [s['id'] for s in segments] == list(range(5))
+    assert [(s['start'], s['end']) for s in segments] == [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0), (4.0, 5.0)]
+    assert result['text'] == ''.join(s['text'] for s in segments)
+    assert result['language'] == 'en'
+
+
+def test_segments_are_streamed_per_chunk(fake_pool, monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, 'find_split_points', lambda audio, *args: [3 * SAMPLE_RATE])
+    streamed = []
+    transcribe_parallel(tone(5), 'tiny', language='es', on_segments=lambda segments, final, language: streamed.append(
+        ([s['start'] for s in segments], final, language)))
+    assert streamed == [([0.0, 1.0, 2.0], False, 'es'), ([3.0, 4.0], True, 'es')]
+    # The pinned language reaches every chunk
+    assert [language for _, language, _ in fake_pool.calls] == ['es', 'es']
+
+
+def test_windows_are_prompted_with_the_text_before_them(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, 'find_split_points', lambda audio, *args: [3 * SAMPLE_RATE])
+    model = FakeModel(language='fr')
+    streamed = []
+    result = parallel_transcribe.transcribe_windows(
+        tone(5), model, lambda segments, final, language: streamed.append((len(segments), final, language)))
+    assert streamed == [(3, False, 'fr'), (2, True, 'fr')]
+    # The first window's language and text carry over to the next one
+    assert [(language, kwargs['initial_prompt']) for _, language, kwargs in model.calls] == [
+        (None, None), ('fr', ' s1.0 s1.1 s1.2')]
+    assert [(s['id'], s['start']) for s in result['segments']] == [(0, 0.0), (1, 1.0), (2, 2.0), (3, 3.0), (4, 4.0)]
+    assert result['language'] == 'fr'
+
+
+def test_segments_are_emitted_as_each_chunk_is_produced():
+    log = []
+
+    def chunks():
+        for n in range(3):
+            log.append(f"produced {n}")
+            yield 'en', [{'start': float(n), 'end': n + 1.0, 'text': f" {n}"}]
+
+    parallel_transcribe._stitch(chunks(), 3, lambda segments, final, language: log.append(
+        f"emitted {segments[0]['id']}{' final' if final else ''}"))
+    assert log == ['produced 0', 'emitted 0', 'produced 1', 'emitted 1', 'produced 2', 'emitted 2 final']
+
+
+def test_windows_are_streamed_before_the_next_one_decodes(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, 'find_split_points', lambda audio, *args: [2 * SAMPLE_RATE])
+    model = FakeModel()
+    decoded_before_emit = []
+    parallel_transcribe.transcribe_windows(
+        tone(4), model, lambda segments, final, language: decoded_before_emit.append(len(model.calls)))
+    assert decoded_before_emit == [1, 2]
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from stages import StageGraph
+
+
+def test_stages_get_their_dependencies_results():
+    graph = StageGraph()
+    graph.add('a', lambda: 2)
+    graph.add('b', lambda a: a * 3, ['a'])
+    graph.add('c', lambda a, b: a + b, ['a', 'b'])
+    assert graph.run() == {'a': 2, 'b': 6, 'c': 8}
+
+
+def test_independent_stages_overlap():
+    both_running = threading.Barrier(2, timeout=5)
+    graph = StageGraph(workers=2)
+    graph.add('left', both_running.wait)
+    graph.add('right', both_running.wait)
+    # Each stage waits for the other, so this only returns if they run at the same time
+    assert set(graph.run()) == {'left', 'right'}
+
+
+def test_add_rejects_bad_stages():
+    graph = StageGraph()
+    graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('b', lambda x: None, ['missing'])
+
+
+def test_failure_cancels_later_stages():
+    ran = []
+    graph = StageGraph()
+    graph.add('a', lambda: 1 / 0)
+    graph.add('b', lambda a: ran.append('b'), ['a'])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+    assert ran == []
+
+
+def test_critical_path_follows_the_slowest_chain():
+    graph = StageGraph()
+    graph.add('start', lambda: None)
+    graph.add('slow', lambda _: time.sleep(0.2), ['start'])
+    graph.add('fast', lambda _: None, ['start'])
+    graph.add('end', lambda *_: None, ['slow', 'fast'])
+    graph.run()
+    seconds, path = graph.critical_path()
+    assert path == ['start', 'slow', 'end']
+    assert seconds >= 0.2
+
+
+def test_run_reports_progress_and_critical_path_on_the_job():
+    class Job:
+        def __init__(self):
+            self.updates = []
+            self.critical_path = None
+
+        def update(self, stage=None, progress=None):
+            self.updates.append((stage, progress))
+
+        def record_critical_path(self, seconds, stages, wall_seconds):
+            self.critical_path = stages
+
+    job = Job()
+    graph = StageGraph(job)
+    graph.add('a', lambda: None)
+    graph.add('b', lambda _: None, ['a'])
+    graph.run(progress=(0.0, 1.0))
+    assert job.critical_path == ['a', 'b']
+    assert [progress for _, progress in job.updates] == [0.0, 0.5]
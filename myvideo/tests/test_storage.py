@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from storage import StorageManager, artifact_kind
+
+POLICIES = {
+    'uploads': {'max_bytes': 0, 'ttl_seconds': 3600},
+    'static': {'max_bytes': 25, 'ttl_seconds': 0},
+}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # Manifest keys are relative to the working directory, like the app's
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('uploads')
+    os.makedirs('static')
+    return StorageManager(path=str(tmp_path / "manifest.db"), policies=POLICIES)
+
+
+def write(manager, path, size, age=0):
+    """Create an artifact, record it and make its last access `age` seconds old."""
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    manager.record(path)
+    with manager._lock:
+        manager._conn.execute("UPDATE artifacts SET last_access = ? WHERE path = ?",
+                              (time.time() - age, manager._key(path)))
+        manager._conn.commit()
+
+
+def test_artifact_kinds():
+    assert artifact_kind('talk_translated.mp4') == 'translated_video'
+    assert artifact_kind('talk_burned.mp4') == 'burned_video'
+    assert artifact_kind('talk.srt') == 'subtitles'
+    assert artifact_kind('talk.mp4') == 'video'
+
+
+def test_expired_artifacts_are_deleted(manager):
+    write(manager, 'uploads/old.mp4', 10, age=2 * 24 * 3600)
+    write(manager, 'uploads/new.mp4', 10, age=60)
+    assert manager.sweep() == ['uploads/old.mp4']
+    assert os.listdir('uploads') == ['new.mp4']
+
+
+def test_quota_evicts_least_recently_used_first(manager):
+    write(manager, 'static/a.mp4', 10, age=3 * 24 * 3600)
+    write(manager, 'static/b.mp4', 10, age=2 * 24 * 3600)
+    write(manager, 'static/c.mp4', 10, age=1 * 24 * 3600)
+    assert manager.sweep() == ['static/a.mp4']
+    assert manager.status()['static']['bytes'] == 20
+
+
+def test_recently_used_artifacts_survive_the_quota(manager):
+    write(manager, 'static/a.mp4', 20, age=60)
+    write(manager, 'static/b.mp4', 20, age=30)
+    assert manager.sweep() == []
+    assert sorted(os.listdir('static')) == ['a.mp4', 'b.mp4']
+
+
+def test_touch_protects_an_artifact(manager):
+    write(manager, 'static/a.mp4', 10, age=3 * 24 * 3600)
+    write(manager, 'static/b.mp4', 10, age=2 * 24 * 3600)
+    manager.touch('static/a.mp4')
+    write(manager, 'static/c.mp4', 10, age=1 * 24 * 3600)
+    assert manager.sweep() == ['static/b.mp4']
+
+
+def test_reindex_adopts_untracked_files(manager):
+    with open('static/orphan.srt', 'w') as f:
+        f.write('1')
+    assert manager.reindex() == {'added': 1, 'removed': 0}
+    os.remove('static/orphan.srt')
+    assert manager.reindex() == {'added': 0, 'removed': 1}
+
+
+def test_touches_are_written_on_flush(manager):
+    write(manager, 'static/a.mp4', 10, age=3 * 24 * 3600)
+    manager.touch('static/a.mp4')
+    before = manager._conn.execute("SELECT last_access FROM artifacts").fetchone()[0]
+    assert before < time.time() - 3600
+    manager.flush_touches()
+    after = manager._conn.execute("SELECT last_access FROM artifacts").fetchone()[0]
+    assert after > time.time() - 60
@@ -0,0 +1,85 @@
+import translation
+from translation import BATCH_SEPARATOR, pack_batches
+
+
+def test_texts_are_packed_under_the_limit():
+    texts = ['aaaa', 'bbbb', 'cccc', 'dd']
+    batches = pack_batches(texts, max_chars=10)
+    assert batches == [[0, 1], [2, 3]]
+    for batch in batches:
+        assert len(BATCH_SEPARATOR.join(texts[i] for i in batch)) <= 10
+
+
+def test_every_text_is_packed_once_in_order():
+    texts = [f"sentence {i}" for i in range(50)]
+    batches = pack_batches(texts, max_chars=40)
+    assert [i for batch in batches for i in batch] == list(range(50))
+
+
+def test_empty_texts_are_left_out():
+    assert pack_batches(['', 'a', '', 'b'], max_chars=10) == [[1, 3]]
+    assert pack_batches([], max_chars=10) == []
+
+
+def test_long_text_gets_its_own_batch():
+    assert pack_batches(['a', 'x' * 20, 'b'], max_chars=10) == [[0], [1], [2]]
+
+
+def test_segments_keep_their_timing(monkeypatch):
+    sent = []
+
+    def fake_batch(texts, target_lang, *args):
+        sent.append(list(texts))
+        return [f"{target_lang}:{t}" for t in texts]
+
+    monkeypatch.setattr(translation, '_translate_batch', fake_batch)
+    segments = [{'start': 0.0, 'end': 1.5, 'text': ' timing one '},
+                {'start': 1.5, 'end': 2.0, 'text': ''},
+                {'start': 2.0, 'end': 3.0, 'text': 'timing two'}]
+    assert translation.translate_segments(segments, 'hi') == [
+        {'start': 0.0, 'end': 1.5, 'text': 'hi:timing one'},
+        {'start': 1.5, 'end': 2.0, 'text': ''},
+        {'start': 2.0, 'end': 3.0, 'text': 'hi:timing two'},
+    ]
+    # Empty segments never reach the translator
+    assert sent == [['timing one', 'timing two']]
+
+
+def test_remembered_texts_skip_the_translator(monkeypatch):
+    sent = []
+
+    def fake_batch(texts, target_lang, *args):
+        sent.extend(texts)
+        return [t.upper() for t in texts]
+
+    monkeypatch.setattr(translation, '_translate_batch', fake_batch)
+    assert translation.translate_texts(['memory one', 'memory one', 'memory two'], 'hi') == [
+        'MEMORY ONE', 'MEMORY ONE', 'MEMORY TWO']
+    assert translation.translate_texts(['memory two', 'memory three'], 'hi') == ['MEMORY TWO', 'MEMORY THREE']
+    # Duplicates go out once, and remembered texts not at all
+    assert sent == ['memory one', 'memory two', 'memory three']
+
+
+def test_narration_is_assembled_from_segment_translations(monkeypatch):
+    monkeypatch.setattr(translation, '_translate_batch', lambda texts, target_lang, *args: [t.upper() for t in texts])
+    monkeypatch.setattr(translation, 'FULL_TEXT_FROM_SEGMENTS', True)
+    segments = [{'start': 0.0, 'end': 1.0, 'text': 'narration one'},
+                {'start': 1.0, 'end': 2.0, 'text': ' '},
+                {'start': 2.0, 'end': 3.0, 'text': 'narration two'}]
+    full, translated = translation.translate_transcript('narration one narration two', segments, 'hi')
+    assert full == 'NARRATION ONE NARRATION TWO'
+    assert [s['text'] for s in translated] == ['NARRATION ONE', '', 'NARRATION TWO']
+
+
+def test_detected_language_is_passed_to_the_translator(monkeypatch):
+    sources = []
+
+    def fake_batch(texts, target_lang, source_lang='auto'):
+        sources.append(source_lang)
+        return list(texts)
+
+    monkeypatch.setattr(translation, '_translate_batch', fake_batch)
+    translation.translate_texts(['source one'], 'hi', 'es')
+    translation.translate_texts(['source two'], 'hi', 'unknown')
+    translation.translate_texts(['source three'], 'hi')
+    assert sources == ['es', 'auto', 'auto']
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return TranslationMemory(path=str(tmp_path / "memory.db"), max_entries=2)
+
+
+def test_lookup_after_put(memory):
+    memory.put("Hello  world ", 'hi', "namaste duniya")
+    # Whitespace is normalized, so trivially different copies share the entry
+    assert memory.get("Hello world", 'hi') == "namaste duniya"
+    assert memory.get("Hello world", 'ta') is None
+
+
+def test_hits_and_misses_are_counted(memory):
+    memory.put_many([("one", "ek"), ("two", "do")], 'hi')
+    assert memory.get_many(["one", "two", "three", ""], 'hi') == {"one": "ek", "two": "do"}
+    stats = memory.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 2)
+    assert stats['hit_rate'] == round(2 / 3, 3)
+
+
+def test_least_recently_used_rows_are_evicted(memory):
+    memory.put("one", 'hi', "ek")
+    time.sleep(0.01)
+    memory.put("two", 'hi', "do")
+    time.sleep(0.01)
+    memory.get("one", 'hi')
+    time.sleep(0.01)
+    memory.put("three", 'hi', "teen")
+    assert memory.stats()['entries'] == 2
+    assert memory.get("two", 'hi') is None
+    assert memory.get("one", 'hi') == "ek"
+
+
+def test_empty_translations_are_not_stored(memory):
+    memory.put_many([("one", ""), ("", "x")], 'hi')
+    assert memory.stats()['entries'] == 0
+
+
+def test_memory_survives_a_restart(tmp_path):
+    TranslationMemory(path=str(tmp_path / "memory.db")).put("one", 'hi', "ek")
+    assert TranslationMemory(path=str(tmp_path / "memory.db")).get("one", 'hi') == "ek"
+
+
+def test_entries_are_kept_per_backend_and_source_language(memory):
+    memory.put("one", 'hi', "ek", 'google', 'en')
+    assert memory.get("one", 'hi', 'google', 'en') == "ek"
+    assert memory.get("one", 'hi', 'marian', 'en') is None
+    assert memory.get("one", 'hi', 'google', 'auto') is None
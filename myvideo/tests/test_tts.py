@@ -0,0 +1,42 @@
+import re
+
+from tts import _filter_path, build_timeline_filter
+
+
+def clip_options(graph):
+    """(window, gap_ms) of every clip in a timeline filter graph, in order."""
+    return [(float(window), int(gap)) for window, gap in
+            re.findall(r"atrim=end=([\d.]+),apad=whole_dur=[\d.]+,adelay=(\d+):all=1", graph)]
+
+
+def test_clips_are_placed_at_their_segment_starts():
+    graph = build_timeline_filter([
+        ({'start': 1.0, 'end': 3.0}, 'a.mp3'),
+        ({'start': 5.5, 'end': 6.0}, 'b.mp3'),
+    ])
+    assert clip_options(graph) == [(2.0, 1000), (0.5, 2500)]
+    assert graph.endswith("[c0][c1]concat=n=2:v=0:a=1[out]")
+
+
+def test_overlapping_segments_start_after_the_previous_window():
+    graph = build_timeline_filter([
+        ({'start': 0.0, 'end': 2.0}, 'a.mp3'),
+        ({'start': 1.5, 'end': 3.0}, 'b.mp3'),
+        ({'start': 3.0, 'end': 3.0}, 'c.mp3'),
+    ])
+    # The second clip only gets what's left of its window; an empty window still gets 50 ms
+    assert clip_options(graph) == [(2.0, 0), (1.0, 0), (0.05, 0)]
+
+
+def test_audio_is_padded_to_the_video_length():
+    graph = build_timeline_filter([({'start': 0.0, 'end': 2.0}, 'a.mp3')], total_duration=10)
+    assert graph.endswith("concat=n=1:v=0:a=1,apad=whole_dur=10.000[out]")
+    graph = build_timeline_filter([({'start': 0.0, 'end': 2.0}, 'a.mp3')], total_duration=1)
+    assert graph.endswith("concat=n=1:v=0:a=1[out]")
+
+
+def test_clip_paths_are_escaped_for_the_filter_graph():
+    escaped = _filter_path("/tmp/it's:clip.mp3")
+    assert escaped.startswith("'") and escaped.endswith("'")
+    assert "\\:" in escaped
+    assert "/tmp/it" in escaped
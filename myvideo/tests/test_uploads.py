@@ -0,0 +1,75 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from uploads import UploadError, UploadManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return UploadManager(str(tmp_path / "uploads"), db_path=str(tmp_path / "uploads.db"))
+
+
+def upload(manager, data, chunk=4, name='clip.mp4'):
+    session = manager.create(name, total_size=len(data))
+    for offset in range(0, len(data), chunk):
+        manager.append(session['upload_id'], offset, io.BytesIO(data[offset:offset + chunk]))
+    return manager.complete(session['upload_id'])
+
+
+def test_chunks_are_appended_at_their_offsets(manager):
+    done = upload(manager, b'0123456789')
+    assert done['status'] == 'complete'
+    assert done['duplicate'] is False
+    assert done['sha256'] == hashlib.sha256(b'0123456789').hexdigest()
+    with open(done['path'], 'rb') as f:
+        assert f.read() == b'0123456789'
+
+
+def test_wrong_offset_reports_where_to_resume(manager):
+    session = manager.create('clip.mp4', total_size=8)
+    manager.append(session['upload_id'], 0, io.BytesIO(b'abcd'))
+    with pytest.raises(UploadError) as err:
+        manager.append(session['upload_id'], 0, io.BytesIO(b'abcd'))
+    assert (err.value.status, err.value.offset) == (409, 4)
+    assert manager.get(session['upload_id'])['offset'] == 4
+
+
+def test_complete_needs_every_byte(manager):
+    session = manager.create('clip.mp4', total_size=8)
+    manager.append(session['upload_id'], 0, io.BytesIO(b'abcd'))
+    with pytest.raises(UploadError) as err:
+        manager.complete(session['upload_id'])
+    assert err.value.offset == 4
+
+
+def test_hash_survives_a_restart(manager, tmp_path):
+    session = manager.create('clip.mp4', total_size=8)
+    manager.append(session['upload_id'], 0, io.BytesIO(b'abcd'))
+    restarted = UploadManager(str(tmp_path / "uploads"), db_path=str(tmp_path / "uploads.db"))
+    restarted.append(session['upload_id'], 4, io.BytesIO(b'efgh'))
+    assert restarted.complete(session['upload_id'])['sha256'] == hashlib.sha256(b'abcdefgh').hexdigest()
+
+
+def test_same_content_is_stored_once(manager):
+    first = upload(manager, b'same bytes')
+    second = upload(manager, b'same bytes', name='copy.mp4')
+    assert second['duplicate'] is True
+    assert second['path'] == first['path']
+    assert len(os.listdir(manager.folder)) == 1
+
+
+def test_known_hash_skips_the_upload(manager):
+    first = upload(manager, b'same bytes')
+    session = manager.create('again.mp4', total_size=10, sha256=first['sha256'])
+    assert session['duplicate'] is True
+    assert session['status'] == 'complete'
+    assert session['path'] == first['path']
+
+
+def test_unknown_upload(manager):
+    with pytest.raises(UploadError) as err:
+        manager.append('missing', 0, io.BytesIO(b'x'))
+    assert err.value.status == 404
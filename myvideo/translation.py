@@ -0,0 +1,135 @@
+"""
+Batched translation for Whisper segments.
+
+Instead of one translator round trip per segment, segment texts are
+packed one-per-line into requests of at most TRANSLATE_BATCH_CHARS
+characters, a bounded number of those requests run concurrently, and the
+translated lines are mapped back onto the original segment timings.
+Texts already in the translation memory skip the translator entirely.
+The translator itself is the configured backend (see backends.py); the
+source language Whisper detected is passed on to it, and 'auto' when
+unknown.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from backends import get_translator
+from translation_memory import TranslationMemory
+
+# Google rejects requests over 5000 characters; leave room for separators
+TRANSLATE_BATCH_CHARS = int(os.getenv("TRANSLATE_BATCH_CHARS", "4500"))
+# Batches sent to the translator at the same time (per job)
+TRANSLATE_MAX_IN_FLIGHT = int(os.getenv("TRANSLATE_MAX_IN_FLIGHT", "4"))
+# Build the translated narration from the segment translations instead of
+# sending the full transcript to the translator a second time
+FULL_TEXT_FROM_SEGMENTS = os.getenv("FULL_TEXT_FROM_SEGMENTS", "1") == "1"
+
+BATCH_SEPARATOR = "\n"
+
+# Shared by every route and worker thread
+translation_memory = TranslationMemory()
+
+
+def pack_batches(texts, max_chars=TRANSLATE_BATCH_CHARS):
+    """
+    Group texts into batches whose joined length stays under max_chars.
+
+    Returns a list of lists of indexes into texts. Empty texts are left out;
+    a single text longer than max_chars gets a batch of its own.
+    """
+    batches = []
+    current, current_len = [], 0
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        added = len(text) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and current_len + added > max_chars:
+            batches.append(current)
+            current, current_len = [], 0
+            added = len(text)
+        current.append(i)
+        current_len += added
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _source(source_lang):
+    """Whisper's language code as the translator's source, 'auto' when not known."""
+    return source_lang if source_lang and source_lang != 'unknown' else 'auto'
+
+
+def _translate_batch(texts, target_lang, source_lang='auto'):
+    translator = get_translator()
+    joined = BATCH_SEPARATOR.join(texts)
+    translated = translator.translate(joined, target_lang, source_lang) or ''
+    lines = [line.strip() for line in translated.split(BATCH_SEPARATOR)]
+    if len(lines) == len(texts):
+        return lines
+    # The translator merged or split lines, so the mapping is lost:
+    # fall back to one request per text for this batch only
+    print(f"Batch of {len(texts)} lines came back as {len(lines)}, translating individually")
+    return [translator.translate(t, target_lang, source_lang) or '' for t in texts]
+
+
+def translate_texts(texts, target_lang, source_lang=None):
+    """Translate a list of strings, returning a list of the same length."""
+    texts = [t.strip() for t in texts]
+    source_lang = _source(source_lang)
+    backend = get_translator().name
+    known = translation_memory.get_many(set(texts), target_lang, backend, source_lang)
+    # Only texts missing from memory go to the translator, each once
+    pending = [t for t in dict.fromkeys(texts) if t and t not in known]
+    batches = pack_batches(pending)
+    if batches:
+        with ThreadPoolExecutor(max_workers=TRANSLATE_MAX_IN_FLIGHT) as pool:
+            translated_batches = pool.map(
+                lambda idxs: _translate_batch([pending[i] for i in idxs], target_lang, source_lang),
+                batches
+            )
+            learned = []
+            for idxs, translated in zip(batches, translated_batches):
+                for i, text in zip(idxs, translated):
+                    known[pending[i]] = text
+                    learned.append((pending[i], text))
+        translation_memory.put_many(learned, target_lang, backend, source_lang)
+    return [known.get(t, '') if t else '' for t in texts]
+
+
+def translate_segments(segments, target_lang, source_lang=None):
+    """Translate Whisper segments, keeping each segment's start/end timing."""
+    translated = translate_texts([s['text'] for s in segments], target_lang, source_lang)
+    return [
+        {'start': s['start'], 'end': s['end'], 'text': text}
+        for s, text in zip(segments, translated)
+    ]
+
+
+def translate_text(text, target_lang, source_lang=None):
+    """Translate one block of text (e.g. a full transcript) through the memory."""
+    text = text.strip()
+    if not text:
+        return ''
+    source_lang = _source(source_lang)
+    translator = get_translator()
+    cached = translation_memory.get(text, target_lang, translator.name, source_lang)
+    if cached is not None:
+        return cached
+    translated = translator.translate(text, target_lang, source_lang) or ''
+    translation_memory.put(text, target_lang, translated, translator.name, source_lang)
+    return translated
+
+
+def translate_transcript(full_text, segments, target_lang, source_lang=None):
+    """
+    Translate a Whisper transcript once per target language.
+
+    Returns (translated_full, translated_segments). With
+    FULL_TEXT_FROM_SEGMENTS the narration is the segment translations joined
+    in order; otherwise the full text is translated on its own as before.
+    """
+    translated_segments = translate_segments(segments, target_lang, source_lang)
+    if FULL_TEXT_FROM_SEGMENTS and segments:
+        translated_full = ' '.join(s['text'] for s in translated_segments if s['text'])
+    else:
+        translated_full = translate_text(full_text, target_lang, source_lang)
+    return translated_full, translated_segments
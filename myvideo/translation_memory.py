@@ -0,0 +1,123 @@
+"""
+Persistent translation memory.
+
+Translations are stored in an embedded SQLite table keyed by
+(sha256 of the translator backend, source language and normalized source
+text, target language), so repeated sentences and re-processed videos
+never reach the translator twice, and switching TRANSLATOR_BACKEND doesn't
+serve another backend's output.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from cache import CACHE_FOLDER
+
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join(CACHE_FOLDER, "translation_memory.db"))
+# Rows kept before the least recently used ones are evicted
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "500000"))
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies share an entry."""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def text_hash(text, backend='', source_lang='auto'):
+    return hashlib.sha256(f"{backend}|{source_lang}|{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, path=TRANSLATION_MEMORY_PATH, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # One connection shared by the worker threads, serialized by _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                source_hash TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (source_hash, target_lang)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self._conn.commit()
+
+    def get_many(self, texts, target_lang, backend='', source_lang='auto'):
+        """Return {text: translation} for every text already in memory."""
+        hashes = {text_hash(t, backend, source_lang): t for t in texts if t}
+        found = {}
+        if not hashes:
+            return found
+        now = time.time()
+        with self._lock:
+            keys = list(hashes)
+            # Stay under SQLite's default limit on bound parameters
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT source_hash, translation FROM translations "
+                    f"WHERE target_lang = ? AND source_hash IN ({placeholders})",
+                    [target_lang] + chunk
+                ).fetchall()
+                for source_hash, translation in rows:
+                    found[hashes[source_hash]] = translation
+                self._conn.execute(
+                    f"UPDATE translations SET last_used = ? "
+                    f"WHERE target_lang = ? AND source_hash IN ({placeholders})",
+                    [now, target_lang] + chunk
+                )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def get(self, text, target_lang, backend='', source_lang='auto'):
+        return self.get_many([text], target_lang, backend, source_lang).get(text)
+
+    def put_many(self, pairs, target_lang, backend='', source_lang='auto'):
+        """Store (source_text, translation) pairs and evict beyond max_entries."""
+        now = time.time()
+        rows = [(text_hash(src, backend, source_lang), target_lang, dst, now) for src, dst in pairs if src and dst]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (source_hash, target_lang, translation, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def put(self, text, target_lang, translation, backend='', source_lang='auto'):
+        self.put_many([(text, translation)], target_lang, backend, source_lang)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'entries': entries,
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,126 @@
+"""
+Speech synthesis with an on-disk cache, plus segment-timed dubbing.
+
+Every synthesis goes through a TTS cache keyed by (text, language, engine),
+so repeated narration is never synthesized twice; the engine is the
+configured TTS backend (gTTS by default, see backends.py). For dubbing,
+each translated Whisper segment is synthesized as its own clip in a thread
+pool, then one ffmpeg filter pass pads or trims every clip to its segment
+window and lays them out on the original timeline, so the dubbed audio
+stays in sync with the video.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import get_speech_engine
+from cache import TTSCache
+
+# Concurrent synthesis calls per job (network requests for gTTS, processes for local engines)
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "8"))
+# Clips are resampled to this rate on the timeline (gTTS output is 24 kHz mono MP3)
+TTS_SAMPLE_RATE = 24000
+
+
+# Shared by every route and worker thread
+tts_cache = TTSCache()
+
+
+def synthesize_clip(text, lang):
+    """Return a cached MP3 of text spoken in lang, synthesizing it on a miss."""
+    engine = get_speech_engine()
+    key = TTSCache.key_for(text, lang, engine.name)
+    clip_path = tts_cache.lookup(key)
+    if clip_path:
+        return clip_path
+    fd, tmp_path = tempfile.mkstemp(suffix='.mp3.tmp', dir=tts_cache.folder)
+    os.close(fd)
+    try:
+        engine.synthesize(text, lang, tmp_path)
+        return tts_cache.store(key, tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def synthesize_to_file(text, lang, output_path):
+    """Write speech for text to output_path, served from the cache when possible."""
+    shutil.copyfile(synthesize_clip(text, lang), output_path)
+    return output_path
+
+
+def synthesize_segments(segments, lang, workers=TTS_WORKERS):
+    """
+    Synthesize every non-empty segment concurrently.
+
+    Returns a list of (segment, clip_path) in timeline order.
+    """
+    spoken = [s for s in segments if s['text'].strip()]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        clips = list(pool.map(lambda s: synthesize_clip(s['text'].strip(), lang), spoken))
+    return list(zip(spoken, clips))
+
+
+def _filter_path(path):
+    # Escape once for the filter's option parser, then quote for the graph parser
+    path = os.path.abspath(path).replace('\\', '/')
+    path = path.replace(':', '\\:').replace("'", "\\'")
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+def build_timeline_filter(timed_clips, total_duration=None):
+    """
+    Build a filter graph that places each clip at its segment start.
+
+    Every clip is trimmed to (or padded with silence up to) its segment
+    window and delayed by the gap since the previous window, and the
+    pieces are concatenated into the [out] stream.
+    """
+    parts = []
+    labels = []
+    cursor = 0.0
+    for i, (seg, clip_path) in enumerate(timed_clips):
+        start = max(float(seg['start']), cursor)
+        window = max(float(seg['end']) - start, 0.05)
+        gap_ms = int(round((start - cursor) * 1000))
+        parts.append(
+            f"amovie={_filter_path(clip_path)},"
+            f"aresample={TTS_SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts=mono,"
+            f"atrim=end={window:.3f},apad=whole_dur={window:.3f},"
+            f"adelay={gap_ms}:all=1[c{i}]"
+        )
+        labels.append(f"[c{i}]")
+        cursor = start + window
+
+    tail = f",apad=whole_dur={total_duration:.3f}" if total_duration and total_duration > cursor else ""
+    parts.append(f"{''.join(labels)}concat=n={len(labels)}:v=0:a=1{tail}[out]")
+    return ";\n".join(parts)
+
+
+def assemble_timeline(timed_clips, output_path, total_duration=None):
+    """Render the timed clips into one audio file with a single ffmpeg run."""
+    graph = build_timeline_filter(timed_clips, total_duration)
+    # The graph can be long for hour-long videos, so pass it as a script file
+    fd, script_path = tempfile.mkstemp(suffix='.ffgraph')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(graph)
+        command = [
+            'ffmpeg', '-y', '-filter_complex_script', script_path,
+            '-map', '[out]', '-c:a', 'libmp3lame', '-q:a', '4',
+            output_path
+        ]
+        subprocess.run(command, check=True)
+    finally:
+        os.remove(script_path)
+    return output_path
+
+
+def synthesize_timed_speech(segments, lang, output_path, total_duration=None):
+    """Dub translated segments onto their timeline and write output_path."""
+    timed_clips = synthesize_segments(segments, lang)
+    if not timed_clips:
+        raise ValueError("No translated text to synthesize")
+    return assemble_timeline(timed_clips, output_path, total_duration)
@@ -0,0 +1,208 @@
+"""
+Resumable chunked uploads.
+
+A client opens an upload session, then sends the file as raw chunks at
+explicit byte offsets. Each chunk is streamed straight into the final file
+in uploads/ while a sha256 is computed as it goes, so an interrupted
+upload resumes from the last byte the server has. When the upload is
+completed, a file whose content hash was already uploaded is dropped in
+favour of the existing copy.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from cache import CACHE_FOLDER
+
+UPLOADS_DB_PATH = os.getenv("UPLOADS_DB_PATH", os.path.join(CACHE_FOLDER, "uploads.db"))
+UPLOAD_CHUNK_READ_BYTES = 1024 * 1024
+# Largest single chunk accepted by PUT /uploads/<id>
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+
+
+class UploadError(Exception):
+    """A request that doesn't fit the upload's state; carries an HTTP status."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def safe_filename(name):
+    name = os.path.basename(name or 'video.mp4')
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name) or 'video.mp4'
+
+
+class UploadManager:
+    def __init__(self, folder, db_path=UPLOADS_DB_PATH):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._upload_locks = {}
+        # Running hashes for uploads in progress: id -> (sha256 object, bytes hashed)
+        self._hashers = {}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                path TEXT NOT NULL,
+                total_size INTEGER,
+                sha256 TEXT,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads (sha256)")
+        self._conn.commit()
+
+    def create(self, filename, total_size=None, sha256=None):
+        """
+        Open an upload session.
+
+        If the client already knows the file's sha256 and that content was
+        uploaded before, the returned session is complete straight away and
+        no bytes need to be sent.
+        """
+        if sha256:
+            existing = self.find_by_hash(sha256)
+            if existing:
+                return dict(existing, duplicate=True)
+        upload_id = str(uuid.uuid4())[:8]
+        path = os.path.join(self.folder, f"{upload_id}_{safe_filename(filename)}")
+        open(path, 'wb').close()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO uploads (id, filename, path, total_size, sha256, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, 'uploading', ?, ?)",
+                (upload_id, safe_filename(filename), path, total_size, now, now)
+            )
+            self._conn.commit()
+        return self.get(upload_id)
+
+    def get(self, upload_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, filename, path, total_size, sha256, status FROM uploads WHERE id = ?",
+                (upload_id,)
+            ).fetchone()
+        if not row:
+            return None
+        upload = dict(zip(('upload_id', 'filename', 'path', 'total_size', 'sha256', 'status'), row))
+        upload['offset'] = os.path.getsize(upload['path']) if os.path.exists(upload['path']) else 0
+        return upload
+
+    def find_by_hash(self, sha256):
+        """A completed upload with this content whose file is still on disk."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM uploads WHERE sha256 = ? AND status = 'complete' ORDER BY created_at",
+                (sha256,)
+            ).fetchall()
+        for (upload_id,) in rows:
+            upload = self.get(upload_id)
+            if upload and os.path.exists(upload['path']):
+                return upload
+        return None
+
+    def append(self, upload_id, offset, stream, length=None):
+        """
+        Write a chunk read from stream at byte offset.
+
+        The offset must equal the bytes already stored; otherwise UploadError
+        (409) carries the offset the client should resume from.
+        """
+        upload = self.get(upload_id)
+        if not upload:
+            raise UploadError("Upload not found", 404)
+        if upload['status'] != 'uploading':
+            raise UploadError("Upload is already complete", 409, upload['offset'])
+        if length is not None and length > UPLOAD_MAX_CHUNK_BYTES:
+            raise UploadError(f"Chunk larger than {UPLOAD_MAX_CHUNK_BYTES} bytes", 413)
+
+        with self._lock_for(upload_id):
+            current = os.path.getsize(upload['path'])
+            if offset != current:
+                raise UploadError(f"Expected offset {current}", 409, current)
+            hasher = self._hasher_for(upload_id, upload['path'], current)
+            written = 0
+            with open(upload['path'], 'r+b') as f:
+                f.seek(current)
+                while True:
+                    block = stream.read(UPLOAD_CHUNK_READ_BYTES)
+                    if not block:
+                        break
+                    f.write(block)
+                    hasher.update(block)
+                    written += len(block)
+                    if written > UPLOAD_MAX_CHUNK_BYTES:
+                        f.truncate(current)
+                        self._hashers.pop(upload_id, None)
+                        raise UploadError(f"Chunk larger than {UPLOAD_MAX_CHUNK_BYTES} bytes", 413)
+            self._hashers[upload_id] = (hasher, current + written)
+            with self._lock:
+                self._conn.execute("UPDATE uploads SET updated_at = ? WHERE id = ?", (time.time(), upload_id))
+                self._conn.commit()
+            return current + written
+
+    def complete(self, upload_id):
+        """
+        Finish an upload and record its sha256.
+
+        If the same content was uploaded before, the new copy is deleted and
+        the session points at the existing file (duplicate=True).
+        """
+        upload = self.get(upload_id)
+        if not upload:
+            raise UploadError("Upload not found", 404)
+        if upload['status'] == 'complete':
+            return dict(upload, duplicate=False)
+        if upload['total_size'] is not None and upload['offset'] != upload['total_size']:
+            raise UploadError(f"Upload has {upload['offset']} of {upload['total_size']} bytes", 409, upload['offset'])
+
+        with self._lock_for(upload_id):
+            hasher = self._hasher_for(upload_id, upload['path'], upload['offset'])
+            sha256 = hasher.hexdigest()
+            self._hashers.pop(upload_id, None)
+            existing = self.find_by_hash(sha256)
+            path = upload['path']
+            if existing and existing['upload_id'] != upload_id:
+                os.remove(path)
+                path = existing['path']
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE uploads SET sha256 = ?, path = ?, status = 'complete', updated_at = ? WHERE id = ?",
+                    (sha256, path, time.time(), upload_id)
+                )
+                self._conn.commit()
+        return dict(self.get(upload_id), duplicate=bool(existing))
+
+    def _lock_for(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def _hasher_for(self, upload_id, path, size):
+        """The running hash for an upload, rebuilt from disk after a restart."""
+        hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hashed == size:
+            return hasher
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            remaining = size
+            while remaining > 0:
+                block = f.read(min(UPLOAD_CHUNK_READ_BYTES, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        self._hashers[upload_id] = (hasher, size)
+        return hasher